@@ -2,11 +2,13 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from flask_socketio import SocketIO
 from config import Config
 
 db = SQLAlchemy()
 migrate = Migrate()
 login = LoginManager()
+socketio = SocketIO()
 login.login_view = 'auth.login'
 login.login_message = 'Faça login para acessar essa página.'
 
@@ -14,10 +16,37 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Perfil do banco: PRAGMAs no SQLite, pool e pre_ping nos servidores
+    from app import database
+    app.config['SQLALCHEMY_DATABASE_URI'] = database.normalize_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = database.engine_options(app.config)
     db.init_app(app)
-    migrate.init_app(app, db)
+    database.init_app(app, db)
+    from app.search import include_object
+    migrate.init_app(app, db, include_object=include_object)
     login.init_app(app)
 
+    # Uploads gravados direto na pasta de anexos, com o hash calculado no caminho
+    from app import storage
+    storage.init_app(app)
+
+    # Commit único no fim da requisição (XP, conquistas, notificações...)
+    from app import uow
+    uow.init_app(app)
+
+    # Cache de fragmentos e páginas (backend escolhido por CACHE_TYPE)
+    from app.cache import cache
+    cache.init_app(app)
+
+    # Limites de curtidas/comentários por janela de tempo (RATE_LIMITS)
+    from app.ratelimit import limiter
+    limiter.init_app(app)
+
+    # Tempo real (curtidas, comentários e notificações via Socket.IO). Os
+    # handlers são importados antes do init_app para valerem em todo app criado.
+    from app.chat import events
+    socketio.init_app(app, message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
+
     # Blueprints
     from app.auth import bp as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -25,4 +54,11 @@ def create_app(config_class=Config):
     from app.main import bp as main_bp
     app.register_blueprint(main_bp)
 
+    from app.chat import bp as chat_bp
+    app.register_blueprint(chat_bp, url_prefix='/chat')
+
+    # Comandos de manutenção (flask reconcile-counters, ...)
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from blinker import Namespace
+from app import db
+from app.catalog import catalog
+
+# --- MOTOR DE CONQUISTAS ---
+# Cada conquista declara de quais eventos depende. As regras só rodam quando um
+# desses eventos acontece (e só enquanto a conquista ainda não foi desbloqueada),
+# então navegar pelo site não custa nada em termos de conquistas. As regras não
+# fazem commit: o desbloqueio e o XP entram no commit da requisição.
+
+# Eventos de domínio
+USER_REGISTERED = 'user_registered'
+POST_CREATED = 'post_created'
+COMMENT_CREATED = 'comment_created'
+LIKE_RECEIVED = 'like_received'
+XP_CHANGED = 'xp_changed'
+
+# Sinal disparado a cada desbloqueio (o blueprint main usa para o flash)
+_signals = Namespace()
+achievement_unlocked = _signals.signal('achievement-unlocked')
+
+_rules = defaultdict(list)  # evento -> [(key, regra)]
+
+# Limites das regras (também usados por `flask achievements backfill`)
+HELPER_COMMENTS = 5
+INFLUENCER_LIKES = 10
+SCHOLAR_LEVEL = 5
+
+def rule(key, *events):
+    """Registra a regra da conquista `key` para os eventos informados"""
+    def decorator(check):
+        for event in events:
+            _rules[event].append((key, check))
+        return check
+    return decorator
+
+# --- REGRAS ---
+@rule('welcome', USER_REGISTERED)
+def _welcome(user, **ctx):
+    return True
+
+@rule('first_post', POST_CREATED)
+def _first_post(user, **ctx):
+    return True
+
+@rule('helper', COMMENT_CREATED)
+def _helper(user, **ctx):
+    return user.comments.count() >= HELPER_COMMENTS
+
+@rule('influencer', LIKE_RECEIVED)
+def _influencer(user, post=None, **ctx):
+    return post is not None and post.like_count >= INFLUENCER_LIKES
+
+@rule('scholar', XP_CHANGED)
+def _scholar(user, **ctx):
+    return user.level >= SCHOLAR_LEVEL
+
+# --- API ---
+def unlock(user, key):
+    """Desbloqueia a conquista para o usuário; retorna a conquista ou None"""
+    ach = catalog.achievement(key)
+    if ach is None or any(a.id == ach.id for a in user.achievements):
+        return None
+    ach = db.session.merge(ach, load=False)
+    user.achievements.append(ach)
+    user.add_xp(ach.xp_reward, 'achievement', ach)
+    achievement_unlocked.send(user, achievement=ach)
+    return ach
+
+def dispatch(event, user, **ctx):
+    """Avalia as regras ligadas ao evento; retorna as conquistas desbloqueadas"""
+    rules = _rules.get(event)
+    if not rules or user is None:
+        return []
+    owned = {a.key for a in user.achievements}
+    unlocked = []
+    for key, check in rules:
+        if key in owned or not check(user, **ctx):
+            continue
+        ach = unlock(user, key)
+        if ach:
+            owned.add(key)
+            unlocked.append(ach)
+    return unlocked
@@ -0,0 +1,37 @@
+import hashlib
+import re
+from functools import lru_cache
+from markupsafe import escape
+
+# --- AVATARES PADRÃO ---
+# Quem não enviou foto ganha um SVG com as iniciais, gerado aqui mesmo (antes
+# cada card dependia do ui-avatars.com). O desenho só depende do nome, então
+# cada nome é renderizado uma vez por processo e a URL pode ser guardada em
+# cache pelo navegador para sempre: trocar de nome muda a URL.
+
+# Mude ao alterar o desenho (invalida os ETags já enviados)
+AVATAR_VERSION = 1
+
+SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="128" height="128" viewBox="0 0 128 128">'
+    '<rect width="128" height="128" fill="#171717"/>'
+    '<text x="50%" y="50%" dy=".35em" text-anchor="middle" fill="#fff" '
+    'font-family="Helvetica, Arial, sans-serif" font-size="52" font-weight="bold">{initials}</text>'
+    '</svg>'
+)
+
+def initials(name):
+    """Até duas iniciais: 'Maria Silva' -> 'MS', 'alice' -> 'AL'"""
+    parts = [p for p in re.split(r'[\s._-]+', name or '') if p]
+    if not parts:
+        return '?'
+    if len(parts) == 1:
+        return parts[0][:2].upper()
+    return (parts[0][0] + parts[1][0]).upper()
+
+@lru_cache(maxsize=4096)
+def render(name):
+    """(svg em bytes, etag) do avatar padrão do nome"""
+    svg = SVG_TEMPLATE.format(initials=escape(initials(name))).encode()
+    etag = hashlib.sha1(b'%d:' % AVATAR_VERSION + svg).hexdigest()
+    return svg, etag
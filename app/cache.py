@@ -0,0 +1,234 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session
+from flask_login import current_user
+
+# --- CACHE DE FRAGMENTOS E PÁGINAS ---
+# Guarda HTML já renderizado (cards do feed, trechos compartilhados, páginas
+# vistas por visitantes) com prazo de validade e limite de entradas. Há dois
+# backends: LRU em memória (por processo) e arquivos em disco (compartilhado
+# entre os processos da máquina). As escritas invalidam o que mudou: apagando
+# a chave ou trocando a "geração" que faz parte das chaves de um grupo.
+
+class NullCache:
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+class LRUCache:
+    """Cache em memória; ao passar de max_entries descarta o menos usado"""
+
+    shared = False  # cada processo tem o seu
+
+    def __init__(self, max_entries=1000, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # chave -> (expira_em, valor)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class FileSystemCache:
+    """Cache em disco (um arquivo por chave); a limpeza roda a cada N gravações"""
+
+    PRUNE_EVERY = 50
+    shared = True  # todos os processos que apontam para a mesma pasta
+
+    def __init__(self, folder, max_entries=1000, default_ttl=300):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._writes = 0
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.folder, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires and expires < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else 0
+        # grava num temporário e renomeia: quem lê nunca vê um arquivo pela metade
+        fd, tmp = tempfile.mkstemp(dir=self.folder, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.folder):
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def _prune(self):
+        """Remove os vencidos e, se ainda passar do limite, os mais antigos"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                with open(path, 'rb') as f:
+                    expires, _ = pickle.load(f)
+                mtime = os.path.getmtime(path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+            if expires and expires < now:
+                self._remove(path)
+            else:
+                entries.append((mtime, path))
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class Cache:
+    """Fachada usada pelo app; o backend de cada aplicação fica em app.extensions"""
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_TYPE', 'lru')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 1000)
+        ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if kind == 'filesystem':
+            backend = FileSystemCache(app.config['CACHE_DIR'], max_entries, ttl)
+        elif kind == 'lru':
+            backend = LRUCache(max_entries, ttl)
+        else:
+            backend = NullCache()
+        app.extensions['cache'] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    @property
+    def shared(self):
+        """True se uma invalidação aqui vale para todos os processos do servidor"""
+        return self.backend.shared
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, fn, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.set(key, value, ttl)
+        return value
+
+    def generation(self, name):
+        """Token atual do grupo `name`; faz parte das chaves do grupo"""
+        token = self.get('gen:' + name)
+        if token is None:
+            token = self.bump(name)
+        return token
+
+    def bump(self, name):
+        """Invalida de uma vez todas as chaves do grupo (elas deixam de ser lidas)"""
+        token = uuid.uuid4().hex[:12]
+        self.set('gen:' + name, token, ttl=0)
+        return token
+
+cache = Cache()
+
+def cached_for_anonymous(generation, ttl=None):
+    """Guarda a página inteira para visitantes sem login (iguais para todos).
+
+    A chave inclui a geração `generation`; as escritas que mudam a página
+    chamam cache.bump(generation). Sem `ttl`, vale PAGE_CACHE_TTL.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_user.is_authenticated or session.get('_flashes'):
+                return view(*args, **kwargs)
+            key = f'page:{cache.generation(generation)}:{request.full_path}'
+            html = cache.get(key)
+            if html is None:
+                html = view(*args, **kwargs)
+                if not isinstance(html, str):
+                    return html  # redirecionamentos e respostas prontas não entram no cache
+                cache.set(key, html, ttl if ttl is not None else current_app.config.get('PAGE_CACHE_TTL'))
+            return html
+        return wrapper
+    return decorator
@@ -0,0 +1,79 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Achievement, Mascote
+
+# --- CATÁLOGO DE DADOS DE REFERÊNCIA ---
+# Conquistas e mascotes quase nunca mudam, então ficam em memória (por processo)
+# já indexadas. Os objetos são carregados numa sessão própria e ficam "soltos"
+# (detached): servem para leitura nos templates. Para ligá-los a outro objeto
+# use db.session.merge(obj, load=False), que não faz SELECT.
+
+class Catalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._loaded_at = 0
+
+    def invalidate(self):
+        self._data = None
+
+    def _get(self):
+        data = self._data
+        ttl = current_app.config.get('CATALOG_TTL')
+        if data is not None and (not ttl or time.monotonic() - self._loaded_at < ttl):
+            return data
+        with self._lock:
+            if self._data is None or data is self._data:
+                self._data = self._load()
+                self._loaded_at = time.monotonic()
+            return self._data
+
+    def _load(self):
+        with Session(db.engine) as session:
+            achievements = session.query(Achievement).order_by(Achievement.id).all()
+            mascotes = session.query(Mascote).order_by(Mascote.tipo, Mascote.evolucao).all()
+        data = {
+            'achievements': achievements,
+            'achievement_by_key': {a.key: a for a in achievements},
+            'mascotes': mascotes,
+            'mascote_by_id': {m.id: m for m in mascotes},
+            'mascote_by_stage': {(m.tipo, m.evolucao): m for m in mascotes},
+            'mascotes_by_tipo': {},
+        }
+        for m in mascotes:
+            data['mascotes_by_tipo'].setdefault(m.tipo, []).append(m)
+        return data
+
+    # Conquistas
+    def achievements(self):
+        return self._get()['achievements']
+
+    def achievement(self, key):
+        return self._get()['achievement_by_key'].get(key)
+
+    # Mascotes
+    def mascotes(self):
+        return self._get()['mascotes']
+
+    def mascote_by_id(self, mascote_id):
+        return self._get()['mascote_by_id'].get(mascote_id)
+
+    def mascote(self, tipo, evolucao):
+        return self._get()['mascote_by_stage'].get((tipo, evolucao))
+
+    def mascotes_by_tipo(self, tipo):
+        return self._get()['mascotes_by_tipo'].get(tipo, [])
+
+catalog = Catalog()
+
+# Qualquer alteração via ORM nessas tabelas (seed, edição pelo admin) invalida o cache
+def _invalidate(mapper, connection, target):
+    catalog.invalidate()
+
+for _model in (Achievement, Mascote):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _invalidate)
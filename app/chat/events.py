@@ -0,0 +1,55 @@
+from flask import current_app
+from flask_login import current_user
+from flask_socketio import emit, join_room, leave_room, rooms
+from app import socketio
+from app.realtime import user_room, post_room
+from app.chat.rooms import history, post_message, room_name
+
+# Limite de salas de post por pedido (uma página do feed tem bem menos)
+MAX_WATCHED_POSTS = 100
+
+@socketio.on('connect')
+def on_connect():
+    if not current_user.is_authenticated:
+        return False  # recusa conexões anônimas
+    join_room(user_room(current_user.id))
+
+@socketio.on('watch_posts')
+def on_watch_posts(post_ids):
+    """Entra nas salas dos posts exibidos na página (curtidas e comentários)"""
+    if not isinstance(post_ids, list):
+        return
+    for post_id in post_ids[:MAX_WATCHED_POSTS]:
+        if isinstance(post_id, int):
+            join_room(post_room(post_id))
+
+@socketio.on('unwatch_posts')
+def on_unwatch_posts(post_ids):
+    if not isinstance(post_ids, list):
+        return
+    for post_id in post_ids[:MAX_WATCHED_POSTS]:
+        if isinstance(post_id, int):
+            leave_room(post_room(post_id))
+
+# --- CHAT POR MATÉRIA ---
+@socketio.on('join_subject')
+def on_join_subject(subject):
+    """Troca de sala e recebe o histórico recente (da memória)"""
+    if subject not in current_app.config['SUBJECTS']:
+        return
+    for room in rooms():
+        if room.startswith('subject_') and room != room_name(subject):
+            leave_room(room)
+    join_room(room_name(subject))
+    emit('chat_history', {'subject': subject, 'messages': history.messages(subject)})
+
+@socketio.on('chat_message')
+def on_chat_message(data):
+    if not isinstance(data, dict):
+        return
+    subject = data.get('subject')
+    body = (data.get('body') or '').strip() if isinstance(data.get('body'), str) else ''
+    if not body or room_name(subject) not in rooms():
+        return
+    body = body[:current_app.config['CHAT_MESSAGE_MAX_LENGTH']]
+    emit('chat_message', post_message(current_user, subject, body), to=room_name(subject))
@@ -0,0 +1,102 @@
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm import Session
+from app import db, socketio
+from app.models import ChatMessage, User
+
+# --- SALAS DE ESTUDO ---
+# Cada matéria tem uma sala. As últimas mensagens de cada sala ficam num
+# buffer circular em memória (o histórico mostrado ao entrar não vai ao banco),
+# e a gravação é "write-behind": as mensagens se acumulam e uma tarefa em
+# segundo plano faz um INSERT em lote a cada CHAT_FLUSH_INTERVAL segundos.
+
+def room_name(subject):
+    return f'subject_{subject}'
+
+class RoomHistory:
+    """Últimas mensagens de cada sala (deque com tamanho máximo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = {}
+
+    def _load(self, subject, size):
+        with Session(db.engine) as session:
+            rows = (session.query(ChatMessage, User.username)
+                    .join(User, User.id == ChatMessage.user_id)
+                    .filter(ChatMessage.subject == subject)
+                    .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+                    .limit(size).all())
+        return deque((message_dict(m.subject, m.user_id, username, m.body, m.timestamp)
+                      for m, username in reversed(rows)), maxlen=size)
+
+    def _room(self, subject):
+        room = self._rooms.get(subject)
+        if room is None:
+            with self._lock:
+                room = self._rooms.get(subject)
+                if room is None:
+                    room = self._rooms[subject] = self._load(subject, current_app.config['CHAT_HISTORY_SIZE'])
+        return room
+
+    def messages(self, subject):
+        return list(self._room(subject))
+
+    def append(self, subject, message):
+        self._room(subject).append(message)
+
+class MessageBuffer:
+    """Fila de mensagens ainda não gravadas (INSERT em lote periódico)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._task = None
+
+    def add(self, row):
+        with self._lock:
+            self._pending.append(row)
+            if self._task is None:
+                app = current_app._get_current_object()
+                self._task = socketio.start_background_task(self._run, app)
+                atexit.register(self.flush, app)
+
+    def _run(self, app):
+        while True:
+            socketio.sleep(app.config['CHAT_FLUSH_INTERVAL'])
+            self.flush(app)
+
+    def flush(self, app):
+        """Grava tudo o que está pendente; devolve quantas mensagens gravou"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        try:
+            with app.app_context(), Session(db.engine) as session:
+                session.execute(db.insert(ChatMessage), rows)
+                session.commit()
+        except Exception:
+            app.logger.exception('Falha ao gravar %d mensagens do chat; nova tentativa no próximo ciclo', len(rows))
+            with self._lock:
+                self._pending[:0] = rows
+            return 0
+        return len(rows)
+
+def message_dict(subject, user_id, username, body, timestamp):
+    return {'subject': subject, 'user_id': user_id, 'username': username,
+            'body': body, 'timestamp': timestamp.isoformat()}
+
+history = RoomHistory()
+buffer = MessageBuffer()
+
+def post_message(user, subject, body):
+    """Registra a mensagem (histórico + fila de gravação) e devolve o que será enviado à sala"""
+    timestamp = datetime.utcnow()
+    message = message_dict(subject, user.id, user.username, body, timestamp)
+    history.append(subject, message)
+    buffer.add({'subject': subject, 'user_id': user.id, 'body': body, 'timestamp': timestamp})
+    return message
@@ -0,0 +1,16 @@
+from flask import render_template, redirect, url_for, current_app, abort
+from flask_login import login_required
+from app.chat import bp
+
+@bp.route('/')
+@login_required
+def index():
+    return redirect(url_for('chat.room', subject=current_app.config['SUBJECTS'][0]))
+
+@bp.route('/<subject>')
+@login_required
+def room(subject):
+    if subject not in current_app.config['SUBJECTS']:
+        abort(404)
+    # O histórico chega pelo socket ao entrar na sala
+    return render_template('chat/room.html', subject=subject, subjects=current_app.config['SUBJECTS'])
@@ -0,0 +1,285 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+import click
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import bindparam, exists, func, literal, select
+from app import db
+from app.achievements import HELPER_COMMENTS, INFLUENCER_LIKES, SCHOLAR_LEVEL
+from app.models import Achievement, Blob, Post, Comment, Notification, User, XpEvent, post_likes, \
+    user_achievements, xp_for_level
+from app.queryplans import check_query_plans
+from app.search import rebuild_index
+from app.seed import seed_achievements, seed_admin, seed_mascotes
+from app.storage import collect_garbage
+from app.uow import xp_committed
+
+# --- COMANDOS DE MANUTENÇÃO (flask <comando>) ---
+
+def post_counter_updates():
+    """UPDATEs (curtidas, comentários) que corrigem os contadores divergentes"""
+    real_likes = (select(func.count()).select_from(post_likes)
+                  .where(post_likes.c.post_id == Post.id).scalar_subquery())
+    real_comments = (select(func.count()).select_from(Comment)
+                     .where(Comment.post_id == Post.id).scalar_subquery())
+    return (db.update(Post).where(Post.like_count != real_likes)
+            .values(like_count=real_likes)
+            .execution_options(synchronize_session=False),
+            db.update(Post).where(Post.comment_count != real_comments)
+            .values(comment_count=real_comments)
+            .execution_options(synchronize_session=False))
+
+def reconcile_post_counters():
+    """Recalcula like_count/comment_count só dos posts que divergiram.
+
+    Retorna (posts corrigidos em curtidas, posts corrigidos em comentários).
+    """
+    likes_update, comments_update = post_counter_updates()
+    likes_fixed = db.session.execute(likes_update).rowcount
+    comments_fixed = db.session.execute(comments_update).rowcount
+    db.session.commit()
+    return likes_fixed, comments_fixed
+
+def reconcile_unread_notifications():
+    """Recalcula user.unread_notifications dos usuários que divergiram"""
+    real_unread = (select(func.count()).select_from(Notification)
+                   .where(Notification.recipient_id == User.id, Notification.is_read == False)
+                   .scalar_subquery())
+    fixed = db.session.execute(
+        db.update(User).where(User.unread_notifications != real_unread)
+        .values(unread_notifications=real_unread)
+        .execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return fixed
+
+@click.command('reconcile-counters')
+@with_appcontext
+def reconcile_counters_command():
+    """Corrige contadores de curtidas/comentários dos posts e de notificações"""
+    likes_fixed, comments_fixed = reconcile_post_counters()
+    click.echo(f'>> Curtidas corrigidas em {likes_fixed} post(s).')
+    click.echo(f'>> Comentários corrigidos em {comments_fixed} post(s).')
+    unread_fixed = reconcile_unread_notifications()
+    click.echo(f'>> Notificações não lidas corrigidas em {unread_fixed} usuário(s).')
+
+# --- HISTÓRICO DE XP (flask xp ...) ---
+xp_cli = AppGroup('xp', help='Manutenção do histórico de XP.')
+
+def compact_xp_events(before):
+    """Junta os eventos anteriores a `before` em um evento por usuário e matéria.
+
+    Retorna quantos eventos foram removidos.
+    """
+    max_id = db.session.scalar(select(func.max(XpEvent.id)).where(XpEvent.timestamp < before))
+    if max_id is None:
+        return 0
+    old = (XpEvent.timestamp < before) & (XpEvent.id <= max_id)
+    # agrupa também por matéria para não perder os rankings por matéria
+    totals = (select(XpEvent.user_id, XpEvent.subject, literal('compacted'),
+                     func.sum(XpEvent.amount), func.max(XpEvent.timestamp))
+              .where(old).group_by(XpEvent.user_id, XpEvent.subject))
+    db.session.execute(db.insert(XpEvent).from_select(
+        ['user_id', 'subject', 'reason', 'amount', 'timestamp'], totals))
+    removed = db.session.execute(db.delete(XpEvent).where(old)).rowcount
+    db.session.commit()
+    return removed
+
+def recompute_user_xp():
+    """Refaz User.xp a partir do histórico; retorna quantos usuários mudaram"""
+    total = (select(func.coalesce(func.sum(XpEvent.amount), 0))
+             .where(XpEvent.user_id == User.id).scalar_subquery())
+    fixed = db.session.execute(
+        db.update(User).where(func.coalesce(User.xp, 0) != total)
+        .values(xp=total)
+        .execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return fixed
+
+@xp_cli.command('compact')
+@click.option('--days', default=90, show_default=True, help='Compacta eventos mais antigos que N dias.')
+def compact_command(days):
+    """Compacta eventos antigos (um evento por usuário e matéria)"""
+    removed = compact_xp_events(datetime.utcnow() - timedelta(days=days))
+    click.echo(f'>> {removed} evento(s) de XP compactado(s).')
+
+@xp_cli.command('recompute')
+def recompute_command():
+    """Recalcula o XP total de cada usuário a partir do histórico"""
+    fixed = recompute_user_xp()
+    click.echo(f'>> XP corrigido para {fixed} usuário(s).')
+
+# --- BUSCA (flask search ...) ---
+search_cli = AppGroup('search', help='Índice de busca (FTS5).')
+
+@search_cli.command('rebuild')
+def search_rebuild_command():
+    """Cria e reconstrói o índice de busca de posts e usuários"""
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('>> Busca FTS5 só existe no SQLite; usando ILIKE neste banco.')
+        return
+    rebuild_index()
+    click.echo('>> Índice de busca reconstruído.')
+
+# --- ANEXOS (flask uploads ...) ---
+uploads_cli = AppGroup('uploads', help='Armazenamento de anexos.')
+
+def reconcile_blob_refcounts():
+    """Recalcula Blob.refcount a partir dos posts; retorna quantos blobs mudaram"""
+    real = (select(func.count()).select_from(Post)
+            .where(Post.blob_hash == Blob.hash).scalar_subquery())
+    fixed = db.session.execute(
+        db.update(Blob).where(Blob.refcount != real)
+        .values(refcount=real)
+        .execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return fixed
+
+@uploads_cli.command('gc')
+@click.option('--grace-hours', default=1, show_default=True, help='Não apaga o que foi enviado há menos de N horas.')
+def uploads_gc_command(grace_hours):
+    """Apaga anexos que nenhum post usa mais e arquivos órfãos"""
+    fixed = reconcile_blob_refcounts()
+    if fixed:
+        click.echo(f'>> Referências corrigidas em {fixed} anexo(s).')
+    blobs, files = collect_garbage(timedelta(hours=grace_hours))
+    click.echo(f'>> {blobs} anexo(s) sem uso removido(s), {files} arquivo(s) apagado(s).')
+
+# --- PLANOS DE CONSULTA (flask check-query-plans) ---
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """Confere que as consultas principais usam os índices (falha se algum não usar)"""
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('>> Verificação feita com EXPLAIN QUERY PLAN do SQLite; nada a fazer neste banco.')
+        return
+    failures = 0
+    for description, index, plan, ok in check_query_plans():
+        click.echo(f'{"OK  " if ok else "FALHA"} {description}: {index}')
+        if not ok:
+            failures += 1
+            for step in plan:
+                click.echo(f'      {step}')
+    if failures:
+        raise click.ClickException(f'{failures} consulta(s) sem o índice esperado.')
+    click.echo('>> Todas as consultas usam os índices esperados.')
+
+# --- DADOS INICIAIS (flask seed ...) ---
+seed_cli = AppGroup('seed', help='Dados de referência e admin (pode rodar quantas vezes quiser).')
+
+@seed_cli.command('reference')
+def seed_reference_command():
+    """Cria/atualiza conquistas e mascotes (ids mantidos)"""
+    click.echo(f'>> {seed_achievements()} conquista(s) e {seed_mascotes()} mascote(s) em dia.')
+
+@seed_cli.command('admin')
+@click.option('--email', default='admin@brainshare.com', show_default=True)
+@click.option('--password', help='Senha do admin (padrão: $ADMIN_PASSWORD ou admin123).')
+def seed_admin_command(email, password):
+    """Cria a conta de administrador, se ainda não existir"""
+    click.echo('>> Admin criado.' if seed_admin(email, password) else '>> Admin já existe.')
+
+@seed_cli.command('all')
+@click.pass_context
+def seed_all_command(ctx):
+    """Dados de referência e admin"""
+    ctx.invoke(seed_reference_command)
+    ctx.invoke(seed_admin_command)
+
+# --- CONQUISTAS (flask achievements ...) ---
+achievements_cli = AppGroup('achievements', help='Conquistas dos usuários.')
+
+def backfill_achievements(dry_run=False):
+    """Concede de uma vez as conquistas que usuários antigos já mereciam.
+
+    Os pares (usuário, conquista) elegíveis saem de poucas consultas agregadas
+    (só usuários que ainda não têm a conquista); as linhas de user_achievements
+    e do histórico de XP entram em lote e o XP total num único UPDATE em lote.
+    Retorna {key: quantidade de usuários}, o XP total concedido e as conquistas
+    ignoradas por não existirem no banco.
+    """
+    achievements = {a.key: a for a in Achievement.query.all()}
+
+    def missing(ach):
+        return ~exists().where(user_achievements.c.user_id == User.id,
+                               user_achievements.c.achievement_id == ach.id)
+
+    def eligible(*conditions):
+        return lambda ach: set(db.session.execute(select(User.id).where(missing(ach), *conditions)).scalars())
+
+    helpers = (select(Comment.user_id).group_by(Comment.user_id)
+               .having(func.count() >= HELPER_COMMENTS))
+    rules = {
+        'welcome': eligible(),
+        'first_post': eligible(exists().where(Post.user_id == User.id)),
+        'helper': eligible(User.id.in_(helpers)),
+        'influencer': eligible(exists().where(Post.user_id == User.id,
+                                              Post.like_count >= INFLUENCER_LIKES)),
+    }
+    # Conquistas sem linha na tabela (seed não rodou) ficam de fora e são avisadas
+    skipped = [key for key in (*rules, 'scholar') if key not in achievements]
+    grants = {key: rule(achievements[key]) for key, rule in rules.items() if key in achievements}
+
+    # scholar depende do XP já somado com as recompensas acima
+    bonus = defaultdict(int)
+    for key, user_ids in grants.items():
+        for uid in user_ids:
+            bonus[uid] += achievements[key].xp_reward or 0
+    scholar = achievements.get('scholar')
+    if scholar is not None:
+        needed = xp_for_level(SCHOLAR_LEVEL)
+        max_bonus = sum(a.xp_reward or 0 for a in achievements.values())
+        candidates = db.session.execute(
+            select(User.id, func.coalesce(User.xp, 0))
+            .where(missing(scholar), func.coalesce(User.xp, 0) >= needed - max_bonus)).all()
+        grants['scholar'] = {uid for uid, xp in candidates if xp + bonus[uid] >= needed}
+        for uid in grants['scholar']:
+            bonus[uid] += scholar.xp_reward or 0
+
+    counts = {key: len(user_ids) for key, user_ids in grants.items()}
+    total_xp = sum(bonus.values())
+    if dry_run or not any(counts.values()):
+        return counts, total_xp, skipped
+
+    now = datetime.utcnow()
+    db.session.execute(db.insert(user_achievements), [
+        {'user_id': uid, 'achievement_id': achievements[key].id, 'unlocked_at': now}
+        for key, user_ids in grants.items() for uid in user_ids])
+    # Histórico igual ao de unlock(): `flask xp recompute` continua batendo
+    events = [{'user_id': uid, 'amount': achievements[key].xp_reward, 'reason': 'achievement',
+               'source_type': 'achievement', 'source_id': achievements[key].id,
+               'subject': None, 'timestamp': now}
+              for key, user_ids in grants.items() if achievements[key].xp_reward
+              for uid in user_ids]
+    if events:
+        db.session.execute(db.insert(XpEvent), events)
+    deltas = [{'uid': uid, 'delta': delta} for uid, delta in bonus.items() if delta]
+    users = User.__table__
+    if deltas:
+        db.session.execute(
+            users.update().where(users.c.id == bindparam('uid'))
+            .values(xp=func.coalesce(users.c.xp, 0) + bindparam('delta')), deltas)
+    db.session.commit()
+    # Ranking, busca de usuários e usuário da sessão reagem como a um commit normal
+    if events:
+        xp_committed.send(None, events=events)
+    return counts, total_xp, skipped
+
+@achievements_cli.command('backfill')
+@click.option('--dry-run', is_flag=True, help='Só mostra o que seria concedido.')
+def achievements_backfill_command(dry_run):
+    """Concede retroativamente as conquistas de quem já cumpria as regras"""
+    counts, total_xp, skipped = backfill_achievements(dry_run=dry_run)
+    for key, count in counts.items():
+        click.echo(f'   {key}: {count} usuário(s)')
+    for key in skipped:
+        click.echo(f'   {key}: ignorada (não existe no banco; rode `flask seed reference`)')
+    verb = 'seriam concedidos' if dry_run else 'concedidos'
+    click.echo(f'>> {sum(counts.values())} desbloqueio(s), {total_xp} XP {verb}.')
+
+def register_commands(app):
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(xp_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(uploads_cli)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(achievements_cli)
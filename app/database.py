@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# --- PERFIS DO BANCO ---
+# SQLite (padrão, um servidor): WAL deixa leituras e a escrita andarem juntas,
+# synchronous=NORMAL evita um fsync por commit e busy_timeout faz quem chega
+# durante uma escrita esperar em vez de receber "database is locked".
+# PostgreSQL (vários processos/máquinas): pool de conexões com pre_ping, para
+# que conexões derrubadas pelo servidor sejam trocadas antes de falhar.
+
+def normalize_url(url):
+    """postgres:// (Heroku/Render) e postgresql:// usam o driver psycopg 3"""
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    if url.startswith('postgresql://'):
+        url = 'postgresql+psycopg://' + url[len('postgresql://'):]
+    return url
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS para o banco configurado (o que já vier definido prevalece)"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if url.get_backend_name() == 'sqlite':
+        return options
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', True)
+    return options
+
+def _sqlite_pragmas(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+def init_app(app, db):
+    """Aplica os PRAGMAs do SQLite em cada conexão nova (chamar depois de db.init_app)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite' and pragmas:
+                event.listen(engine, 'connect', _sqlite_pragmas(pragmas))
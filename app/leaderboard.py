@@ -0,0 +1,181 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User, XpEvent
+from app.uow import xp_committed
+
+# --- RANKING PRÉ-CALCULADO ---
+# Cada ranking é uma lista ordenada de chaves (-xp, user_id). Top-N, "minha
+# posição" e "quem está perto de mim" são buscas binárias (O(log n)); cada
+# mudança de XP move só a chave do usuário afetado, sem reordenar tudo (a
+# remoção/inserção na lista é O(n), mas é um memmove: microssegundos mesmo
+# com dezenas de milhares de usuários).
+
+class RankedBoard:
+    def __init__(self, scores=None):
+        self._scores = dict(scores or {})
+        self._keys = sorted((-xp, uid) for uid, xp in self._scores.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, user_id, delta):
+        """Soma delta ao usuário: busca O(log n), mover a chave na lista O(n)"""
+        old = self._scores.get(user_id)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        new = (old or 0) + delta
+        self._scores[user_id] = new
+        insort(self._keys, (-new, user_id))
+
+    def remove(self, user_id):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+
+    def score(self, user_id):
+        return self._scores.get(user_id)
+
+    def rank(self, user_id):
+        """Posição (1 = primeiro) ou None se o usuário não está no ranking"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score, user_id)) + 1
+
+    def top(self, n):
+        """[(posição, user_id, xp)] dos n primeiros"""
+        return [(i + 1, uid, -neg) for i, (neg, uid) in enumerate(self._keys[:n])]
+
+    def around(self, user_id, radius=2):
+        """[(posição, user_id, xp)] dos vizinhos do usuário"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - radius, 0)
+        return [(start + i + 1, uid, -neg)
+                for i, (neg, uid) in enumerate(self._keys[start:rank + radius])]
+
+OPENING_BALANCE = 'opening_balance'
+
+def week_start(now=None):
+    """Segunda-feira 00:00 (UTC) da semana atual"""
+    now = now or datetime.utcnow()
+    return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+
+def weekly_totals_query(session, week):
+    """XP ganho por usuário desde o início da semana"""
+    # O saldo inicial (XP anterior ao histórico) não foi ganho na semana em que
+    # a migração ou o seed o gravou
+    return (session.query(XpEvent.user_id, func.sum(XpEvent.amount))
+            .filter(XpEvent.timestamp >= week,
+                    or_(XpEvent.reason.is_(None), XpEvent.reason != OPENING_BALANCE))
+            .group_by(XpEvent.user_id))
+
+def subject_totals_query(session):
+    """XP por (matéria, usuário)"""
+    return (session.query(XpEvent.subject, XpEvent.user_id, func.sum(XpEvent.amount))
+            .filter(XpEvent.subject.isnot(None))
+            .group_by(XpEvent.subject, XpEvent.user_id))
+
+class Leaderboard:
+    """Rankings global, semanal e por matéria, mantidos em memória no processo"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._state = None
+        self._refreshing = False
+
+    def invalidate(self):
+        self._state = None
+
+    def _get(self):
+        state = self._state
+        # Construção síncrona só na primeira vez, após invalidate() ou na virada da semana
+        if state is None or state['week'] != week_start():
+            with self._lock:
+                if self._state is None or self._state is state:
+                    self._state = self._build(db.engine)
+                return self._state
+        ttl = current_app.config.get('LEADERBOARD_TTL')
+        if ttl and time.monotonic() - state['built_at'] >= ttl:
+            self._refresh(db.engine)
+        return state
+
+    def _refresh(self, engine):
+        """Ressincroniza com o banco numa thread; até lá, segue servindo o ranking atual"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                state = self._build(engine)
+                with self._lock:
+                    if self._state is not None and self._state['week'] == state['week']:
+                        self._state = state
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def _build(self, engine):
+        week = week_start()
+        with Session(engine) as session:
+            users = session.query(User.id, User.xp, User.role).all()
+            weekly = weekly_totals_query(session, week).all()
+            by_subject = subject_totals_query(session).all()
+        # Admins não entram nos rankings
+        excluded = {uid for uid, xp, role in users if role == 'admin'}
+        subjects = defaultdict(dict)
+        for subject, uid, total in by_subject:
+            if uid not in excluded:
+                subjects[subject][uid] = total
+        return {
+            'week': week,
+            'built_at': time.monotonic(),
+            'excluded': excluded,
+            'global': RankedBoard({uid: xp or 0 for uid, xp, role in users if uid not in excluded}),
+            'weekly': RankedBoard({uid: total for uid, total in weekly if uid not in excluded}),
+            'subjects': {subject: RankedBoard(scores) for subject, scores in subjects.items()},
+        }
+
+    def board(self, subject=None, weekly=False):
+        state = self._get()
+        if subject:
+            return state['subjects'].get(subject) or RankedBoard()
+        return state['weekly'] if weekly else state['global']
+
+    def apply(self, events):
+        """Aplica eventos de XP já gravados (incremental, sem ir ao banco)"""
+        state = self._state
+        if state is None:
+            return
+        with self._lock:
+            for ev in events:
+                uid = ev['user_id']
+                if uid in state['excluded']:
+                    continue
+                state['global'].add(uid, ev['amount'])
+                if ev['timestamp'] >= state['week'] and ev.get('reason') != OPENING_BALANCE:
+                    state['weekly'].add(uid, ev['amount'])
+                if ev.get('subject'):
+                    state['subjects'].setdefault(ev['subject'], RankedBoard()).add(uid, ev['amount'])
+
+leaderboard = Leaderboard()
+
+@xp_committed.connect
+def _on_xp_committed(sender, events):
+    leaderboard.apply(events)
+
+def load_rows(entries):
+    """Troca os user_ids de [(posição, user_id, xp)] pelos objetos User (1 consulta)"""
+    ids = [uid for _, uid, _ in entries]
+    users = {u.id: u for u in User.query.filter(User.id.in_(ids))} if ids else {}
+    return [(rank, users[uid], score) for rank, uid, score in entries if uid in users]
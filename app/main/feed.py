@@ -0,0 +1,208 @@
+import base64
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from flask import current_app, render_template
+from markupsafe import Markup
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+from app import db
+from app.cache import cache
+from app.uow import current_uow
+from app.models import Post, User, Comment, Notification, post_likes
+
+# --- PAGINAÇÃO POR CURSOR (timestamp, id) ---
+# O cursor aponta para o último item (post, notificação) da página anterior. Como a consulta
+# continua a partir dele usando o índice de timestamp, o custo de cada página
+# não depende de quantos posts existem antes dela (ao contrário de OFFSET).
+
+def encode_cursor(item):
+    raw = f'{item.timestamp.isoformat()}|{item.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Retorna (timestamp, id) ou None se o cursor for inválido"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts, item_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(ts), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def page_query(query, model, position=None, per_page=None):
+    """A consulta de uma página: depois de `position` (timestamp, id), um item a mais"""
+    per_page = per_page or current_app.config['POSTS_PER_PAGE']
+    if position:
+        ts, item_id = position
+        query = query.filter(or_(model.timestamp < ts,
+                                 and_(model.timestamp == ts, model.id < item_id)))
+    # Busca um a mais só para saber se existe próxima página
+    return query.order_by(model.timestamp.desc(), model.id.desc()).limit(per_page + 1)
+
+def paginate(query, model, cursor=None, per_page=None):
+    """Aplica a paginação por cursor em uma query de um modelo com timestamp e id.
+
+    Retorna (itens, next_cursor); next_cursor é None na última página.
+    """
+    per_page = per_page or current_app.config['POSTS_PER_PAGE']
+    items = page_query(query, model, decode_cursor(cursor), per_page).all()
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, encode_cursor(items[-1])
+    return items, None
+
+def paginate_posts(query, cursor=None, per_page=None):
+    return paginate(query, Post, cursor, per_page)
+
+# --- CONSULTAS DAS LISTAS ---
+# Montadas aqui para que as rotas e `flask check-query-plans` usem a mesma SQL
+
+def feed_query(subject=None):
+    query = Post.query
+    if subject:
+        query = query.filter_by(subject=subject)
+    return query
+
+def reported_posts_query():
+    return Post.query.filter_by(status='denunciada')
+
+def notifications_query(user):
+    return user.notifications.options(joinedload(Notification.sender), joinedload(Notification.post))
+
+def mark_all_read_statement(recipient_id):
+    """UPDATE que marca como lidas todas as notificações não lidas do usuário"""
+    return (db.update(Notification)
+            .where(Notification.recipient_id == recipient_id, Notification.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False))
+
+def liked_ids_query(user_id, post_ids):
+    """Quais destes posts o usuário curtiu"""
+    return (db.session.query(post_likes.c.post_id)
+            .filter(post_likes.c.user_id == user_id, post_likes.c.post_id.in_(post_ids)))
+
+def comments_query(post_ids):
+    """Comentários (com autor) dos posts, em ordem de envio"""
+    return (Comment.query.filter(Comment.post_id.in_(post_ids))
+            .options(joinedload(Comment.author))
+            .order_by(Comment.timestamp, Comment.id))
+
+# --- CARREGAMENTO EM LOTE DOS CARDS ---
+# Cada card do feed precisa do autor, dos comentários e de saber se o usuário
+# atual curtiu (as contagens já ficam em like_count/comment_count). Em vez de
+# deixar o template disparar essas consultas post a post (N+1), buscamos tudo
+# de uma vez para a página inteira.
+
+class PostCard:
+    """Dados já carregados de um post, prontos para o template"""
+    __slots__ = ('post', 'author', 'like_count', 'comment_count', 'liked', 'comments', 'fragment')
+
+    def __init__(self, post, author, like_count=0, comment_count=0, liked=False, comments=(), fragment=None):
+        self.post = post
+        self.author = author
+        self.like_count = like_count
+        self.comment_count = comment_count
+        self.liked = liked
+        self.comments = list(comments)
+        self.fragment = fragment
+
+# --- FRAGMENTOS DOS CARDS EM CACHE ---
+# Título, texto, anexo e a lista de comentários são iguais para qualquer
+# usuário: ficam renderizados no cache por post. Só o que depende de quem vê
+# (curtiu?, excluir/denunciar, formulário de comentário) é montado a cada vez.
+# A chave inclui a geração "users" porque os comentários mostram nome, foto e
+# cargo dos autores.
+
+CardFragment = namedtuple('CardFragment', 'content comments')
+
+def card_key(post_id):
+    return f'card:{post_id}:{cache.generation("users")}'
+
+def _render_fragment(post, comments):
+    return CardFragment(
+        Markup(render_template('main/_post_card_content.html', post=post)),
+        Markup(render_template('main/_post_card_comments.html', comments=comments)))
+
+def fragment_ttl():
+    """Validade dos cards e contadores invalidados pelas escritas.
+
+    Num cache por processo (lru) a invalidação só chega ao processo que fez a
+    escrita; os outros ficam no máximo LOCAL_CACHE_TTL segundos desatualizados.
+    """
+    return None if cache.shared else current_app.config.get('LOCAL_CACHE_TTL')
+
+def post_count_key(user_id):
+    return f'post_count:{user_id}'
+
+def invalidate_post(post_id, author_id=None):
+    """Descarta o card do post e as páginas de visitantes (após o commit)"""
+    def run():
+        cache.delete(card_key(post_id))
+        if author_id is not None:
+            cache.delete(post_count_key(author_id))
+        cache.bump('feed')
+    current_uow().after_commit(run)
+
+def invalidate_feed(author_id=None):
+    """Descarta as páginas de visitantes (contagens, posts novos) após o commit"""
+    def run():
+        if author_id is not None:
+            cache.delete(post_count_key(author_id))
+        cache.bump('feed')
+    current_uow().after_commit(run)
+
+def invalidate_users():
+    """Nome/foto/cargo mudaram: descarta tudo que mostra usuários (após o commit)"""
+    def run():
+        cache.bump('users')
+        cache.bump('feed')
+    current_uow().after_commit(run)
+
+def load_post_cards(posts, viewer=None, with_comments=True, cached=False):
+    """Monta os PostCards de uma lista de posts com um número fixo de consultas.
+
+    Com cached=True os cards trazem `fragment` (conteúdo e comentários já
+    renderizados) e os comentários só são consultados para os posts fora do cache.
+    """
+    if not posts:
+        return []
+    post_ids = [p.id for p in posts]
+
+    fragments = {}
+    if cached:
+        for pid in post_ids:
+            fragment = cache.get(card_key(pid))
+            if fragment is not None:
+                fragments[pid] = fragment
+
+    # 1. Autores
+    author_ids = {p.user_id for p in posts}
+    authors = {u.id: u for u in User.query.filter(User.id.in_(author_ids))}
+
+    # 2. Posts que o usuário atual curtiu
+    liked_ids = set()
+    if viewer is not None and viewer.is_authenticated:
+        liked_ids = {pid for (pid,) in liked_ids_query(viewer.id, post_ids)}
+
+    # 3. Comentários (com autor); as contagens já vêm das colunas do post
+    comments_by_post = defaultdict(list)
+    missing = [pid for pid in post_ids if pid not in fragments]
+    if with_comments and missing:
+        for c in comments_query(missing):
+            comments_by_post[c.post_id].append(c)
+
+    if cached:
+        for p in posts:
+            if p.id not in fragments:
+                fragments[p.id] = _render_fragment(p, comments_by_post.get(p.id, ()))
+                cache.set(card_key(p.id), fragments[p.id], fragment_ttl())
+
+    return [PostCard(p, authors.get(p.user_id),
+                     like_count=p.like_count,
+                     comment_count=p.comment_count,
+                     liked=p.id in liked_ids,
+                     comments=comments_by_post.get(p.id, ()),
+                     fragment=fragments.get(p.id))
+            for p in posts]
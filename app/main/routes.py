@@ -1,91 +1,66 @@
 import os
+import secrets
 from werkzeug.utils import secure_filename
-from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, has_request_context, \
+    abort, send_from_directory
 from flask_login import login_required, current_user
-from app import db
+from sqlalchemy.orm.attributes import set_committed_value
+from markupsafe import Markup
+from app import db, avatars
 from app.main import bp
-from app.models import Post, User, Comment, Notification, Achievement, Mascote, MascoteUsuario
+from app.models import Post, User, Comment, Notification, MascoteUsuario, level_for_xp, \
+    invalidate_session_user
 from app.decorators import admin_required, professor_required
-from datetime import datetime, date
+from app.achievements import dispatch, achievement_unlocked, POST_CREATED, COMMENT_CREATED, LIKE_RECEIVED
+from app.main.feed import paginate, paginate_posts, load_post_cards, post_count_key, fragment_ttl, \
+    invalidate_post, invalidate_feed, invalidate_users, feed_query, reported_posts_query, \
+    notifications_query, mark_all_read_statement
+from app.cache import cache, cached_for_anonymous
+from app.catalog import catalog
+from app.leaderboard import leaderboard as ranking, load_rows
+from app.search import search_posts, search_users
+from app.typeahead import usernames
+from app.realtime import publish, post_room
+from app.storage import store_upload, send_blob
+from app.ratelimit import limiter
 
 # --- HELPERS ---
-@bp.context_processor
+@bp.app_context_processor
 def inject_notifications():
     if current_user.is_authenticated:
         return dict(unread_count=current_user.new_notifications())
     return dict(unread_count=0)
 
-def check_and_reset_daily_limits(user):
-    today = date.today()
-    # Ensure last_activity_reset exists and compare dates
-    if user.last_activity_reset is None or user.last_activity_reset.date() < today:
-        user.daily_likes = 0
-        user.daily_comments = 0
-        user.last_activity_reset = datetime.utcnow()
-        db.session.commit()
-
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-# FUNÇÃO MÁGICA: Desbloqueia Conquista
-def check_and_unlock(user, achievement_key):
-    ach = Achievement.query.filter_by(key=achievement_key).first()
-    if ach and ach not in user.achievements:
-        user.achievements.append(ach)
-        user.add_xp(ach.xp_reward)
-        db.session.commit()
-        # Flash especial de conquista
-        flash(f'🏆 CONQUISTA DESBLOQUEADA: {ach.name} (+{ach.xp_reward} XP)!')
-        return True
-    return False
-
-# VERIFICAÇÃO AUTOMÁTICA DE CONQUISTAS
-def check_all_achievements(user):
-    """Verifica e desbloqueia todas as conquistas disponíveis para o usuário"""
-    if not user:
-        return
-    
-    # Conquista welcome (sempre desbloqueada para usuários logados)
-    check_and_unlock(user, 'welcome')
-    
-    # Conquista scholar (nível >= 5)
-    if user.level >= 5:
-        check_and_unlock(user, 'scholar')
-    
-    # Conquista first_post (1+ posts)
-    if user.posts.count() >= 1:
-        check_and_unlock(user, 'first_post')
-    
-    # Conquista helper (5+ comentários)
-    if user.comments.count() >= 5:
-        check_and_unlock(user, 'helper')
-    
-    # Conquista influencer (algum post com 10+ likes)
-    has_influencer_post = any(post.likes_count >= 10 for post in user.posts)
-    if has_influencer_post:
-        check_and_unlock(user, 'influencer')
+# Flash especial quando o próprio usuário desbloqueia uma conquista
+@achievement_unlocked.connect
+def flash_achievement(user, achievement):
+    if has_request_context() and current_user.is_authenticated and user.id == current_user.id:
+        flash(f'🏆 CONQUISTA DESBLOQUEADA: {achievement.name} (+{achievement.xp_reward} XP)!')
 
 # --- ROTAS ---
 
 @bp.route('/')
+@cached_for_anonymous('feed')
 def index():
     subject_filter = request.args.get('subject')
-    query = Post.query
-    if subject_filter: query = query.filter_by(subject=subject_filter)
-    posts = query.order_by(Post.timestamp.desc()).all()
-    
-    # VERIFICAÇÃO AUTOMÁTICA DE TODAS AS CONQUISTAS
-    if current_user.is_authenticated:
-        check_all_achievements(current_user)
-        
-    return render_template('main/index.html', posts=posts, current_filter=subject_filter)
+    posts, next_cursor = paginate_posts(feed_query(subject_filter), request.args.get('cursor'))
+    next_url = url_for('main.index', subject=subject_filter, cursor=next_cursor, partial=1) if next_cursor else None
+    cards = load_post_cards(posts, current_user, cached=True)
+
+    # "Carregar mais": devolve só os próximos cards
+    if request.args.get('partial'):
+        return render_template('main/_post_list.html', cards=cards, next_url=next_url)
+    return render_template('main/index.html', cards=cards, next_url=next_url, current_filter=subject_filter)
 
 # --- GALERIA DE CONQUISTAS ---
 @bp.route('/achievements')
 @login_required
 def achievements():
     # Pega todas as conquistas do sistema
-    all_achievements = Achievement.query.all()
+    all_achievements = catalog.achievements()
     # Pega as IDs das que o usuário já tem
     unlocked_ids = [a.id for a in current_user.achievements]
     
@@ -99,100 +74,98 @@ def create_post():
     post_type = request.form.get('type')
     subject = request.form.get('subject')
     file = request.files.get('file')
-    filename = None
+    filename = blob_hash = None
+
+    if not title or not body:
+        return redirect(url_for('main.index'))
 
     if file and file.filename != '' and allowed_file(file.filename):
+        # Guardado pelo conteúdo; o nome original fica só para exibição/download
         filename = secure_filename(file.filename)
-        file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+        blob_hash = store_upload(file)
 
-    if not title or not body:
-        return redirect(url_for('main.index'))
+    post = Post(title=title, body=body, type=post_type, subject=subject, filename=filename,
+                blob_hash=blob_hash, author=current_user)
+    db.session.add(post)
 
-    post = Post(title=title, body=body, type=post_type, subject=subject, filename=filename, author=current_user)
-    
     if post_type == 'material':
-        current_user.add_xp(50)
+        current_user.add_xp(50, 'material', post)
         flash('Material publicado! +50 XP 🚀')
     else:
-        current_user.add_xp(10)
+        current_user.add_xp(10, 'post', post)
         flash('Dúvida publicada! +10 XP')
 
-    db.session.add(post)
+    dispatch(POST_CREATED, current_user, post=post)
+    invalidate_feed(author_id=current_user.id)
     db.session.commit()
-    
-    # CHECK CONQUISTA: PRIMEIRO POST
-    if current_user.posts.count() == 1:
-        check_and_unlock(current_user, 'first_post')
 
     return redirect(url_for('main.index'))
 
 @bp.route('/post/<int:post_id>/comment', methods=['POST'])
 @login_required
 def comment_post(post_id):
-    check_and_reset_daily_limits(current_user)
-    if (current_user.daily_comments or 0) >= 3:
-        flash('Você atingiu o limite diário de comentários.')
-        return redirect(request.referrer or url_for('main.index'))
-
     post = Post.query.get_or_404(post_id)
     text = request.form.get('text')
     
     if not text: return redirect(url_for('main.index'))
+
+    if not limiter.hit('comment', current_user):
+        flash('Você atingiu o limite diário de comentários.')
+        return redirect(request.referrer or url_for('main.index'))
         
     comment = Comment(body=text, author=current_user, post=post)
-    current_user.add_xp(20)
-    # handle possible NULL/None stored in DB
-    if current_user.daily_comments is None:
-        current_user.daily_comments = 0
-    current_user.daily_comments += 1
+    db.session.add(comment)
+    post.comment_count = Post.comment_count + 1
+    current_user.add_xp(20, 'comment', comment)
     
     if post.author != current_user:
         notif = Notification(recipient=post.author, sender=current_user, post=post, action='comment')
         db.session.add(notif)
     
-    db.session.add(comment)
+    dispatch(COMMENT_CREATED, current_user, comment=comment)
+    db.session.flush()
+    publish('comment', {'post_id': post.id, 'comment_count': post.comment_count,
+                        'author': current_user.username, 'avatar': current_user.avatar, 'body': comment.body},
+            post_room(post.id))
+    invalidate_post(post.id)
     db.session.commit()
     
     flash('Comentário enviado! +20 XP')
-    
-    # CHECK CONQUISTA: MÃO AMIGA (5 Comentários)
-    if current_user.comments.count() >= 5:
-        check_and_unlock(current_user, 'helper')
-        
     return redirect(request.referrer or url_for('main.index'))
 
 @bp.route('/post/<int:post_id>/like', methods=['POST'])
 @login_required
 def like_post(post_id):
-    check_and_reset_daily_limits(current_user)
     post = Post.query.get_or_404(post_id)
     
-    if post in current_user.liked_posts:
+    # Busca só esta curtida (chave primária de post_likes), sem carregar a lista toda
+    if current_user.liked_posts.filter(Post.id == post.id).first() is not None:
         current_user.liked_posts.remove(post)
+        post.like_count = Post.like_count - 1
         action = 'unlike'
-        if post.author != current_user: post.author.add_xp(-10)
+        if post.author != current_user: post.author.add_xp(-10, 'like_removed', post)
     else:
-        if (current_user.daily_likes or 0) >= 3:
+        if not limiter.hit('like', current_user):
             return jsonify({'error': 'Limite diário de curtidas atingido.'}), 403
-        # handle possible NULL/None stored in DB
-        if current_user.daily_likes is None:
-            current_user.daily_likes = 0
         current_user.liked_posts.append(post)
-        current_user.daily_likes += 1
+        # incremento feito no próprio UPDATE, sem ler/contar antes
+        post.like_count = Post.like_count + 1
         action = 'like'
         if post.author != current_user:
-            post.author.add_xp(10)
+            post.author.add_xp(10, 'like_received', post)
             exists = Notification.query.filter_by(recipient=post.author, sender=current_user, post=post, action='like', is_read=False).first()
             if not exists:
                 notif = Notification(recipient=post.author, sender=current_user, post=post, action='like')
                 db.session.add(notif)
-                
-                # CHECK CONQUISTA: INFLUENCIADOR (Para o dono do post)
-                if post.likes_count >= 10:
-                    check_and_unlock(post.author, 'influencer')
 
+    db.session.flush()  # like_count atualizado (regra do influenciador e evento abaixo)
+    if action == 'like' and post.author != current_user:
+        dispatch(LIKE_RECEIVED, post.author, post=post)
+    likes_count = post.like_count
+    publish('like', {'post_id': post.id, 'likes_count': likes_count}, post_room(post.id))
+    invalidate_feed()  # o card não guarda curtidas; só as páginas de visitantes mudam
     db.session.commit()
-    return jsonify({'action': action, 'likes_count': post.likes_count, 'author_xp': post.author.xp})
+    return jsonify({'action': action, 'likes_count': likes_count, 'author_xp': post.author.xp})
 
 # ... (MANTENHA AS OUTRAS ROTAS: post_detail, delete_post, admin, profile, etc.) ...
 # Vou manter as rotas existentes resumidas aqui para não cortar o código, 
@@ -202,7 +175,20 @@ def like_post(post_id):
 @login_required
 def post_detail(post_id):
     post = Post.query.get_or_404(post_id)
-    return render_template('main/post_detail.html', post=post)
+    card = load_post_cards([post], current_user)[0]
+    return render_template('main/post_detail.html', post=post, card=card)
+
+@bp.route('/post/<int:post_id>/attachment')
+@login_required
+def attachment(post_id):
+    post = Post.query.get_or_404(post_id)
+    if not post.filename:
+        abort(404)
+    as_attachment = bool(request.args.get('download'))
+    if post.blob_hash:
+        return send_blob(post.blob_hash, post.filename, as_attachment=as_attachment)
+    # Posts anteriores ao armazenamento por conteúdo
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], post.filename, as_attachment=as_attachment)
 
 @bp.route('/post/<int:post_id>/delete', methods=['POST'])
 @login_required
@@ -211,6 +197,7 @@ def delete_post(post_id):
     if post.author != current_user and not current_user.is_admin:
         flash('Sem permissão.')
         return redirect(url_for('main.index'))
+    invalidate_post(post.id, author_id=post.user_id)
     db.session.delete(post)
     db.session.commit()
     flash('Post removido.')
@@ -226,7 +213,8 @@ def mark_solution(comment_id):
         flash('Já existe uma solução.')
         return redirect(url_for('main.post_detail', post_id=post.id))
     comment.is_best_answer = True
-    comment.author.add_xp(100)
+    comment.author.add_xp(100, 'best_answer', comment)
+    invalidate_post(post.id)
     db.session.commit()
     flash('Solução marcada!')
     return redirect(url_for('main.post_detail', post_id=post.id))
@@ -234,20 +222,60 @@ def mark_solution(comment_id):
 @bp.route('/leaderboard')
 @login_required
 def leaderboard():
-    users = User.query.filter((User.role != 'admin') | (User.role == None)).order_by(User.xp.desc()).limit(50).all()
-    return render_template('main/leaderboard.html', users=users)
+    subject = request.args.get('subject') or None
+    period = request.args.get('period')
+    board = ranking.board(subject=subject, weekly=(period == 'week'))
+    # O top 50 é igual para todos: linhas renderizadas ficam no cache por alguns segundos
+    key = f'leaderboard:{subject}:{period == "week"}:{cache.generation("users")}'
+    rows_html = cache.get_or_set(
+        key, lambda: Markup(render_template('main/_leaderboard_rows.html', rows=load_rows(board.top(50)))),
+        current_app.config['LEADERBOARD_CACHE_TTL'])
+
+    # Posição do usuário (e vizinhos, se ele estiver fora do top 50)
+    my_rank = board.rank(current_user.id)
+    around = load_rows(board.around(current_user.id)) if my_rank and my_rank > 50 else []
+    return render_template('main/leaderboard.html', rows_html=rows_html, around=around, my_rank=my_rank,
+                           my_score=board.score(current_user.id), current_subject=subject, period=period)
 
 @bp.route('/user/<username>')
 @login_required
 def profile(username):
     user = User.query.filter_by(username=username).first_or_404()
-    posts = user.posts.order_by(Post.timestamp.desc()).all()
-    return render_template('main/profile.html', user=user, posts=posts)
+    posts, next_cursor = paginate_posts(user.posts, request.args.get('cursor'))
+    next_url = url_for('main.profile', username=username, cursor=next_cursor, partial=1) if next_cursor else None
+    cards = load_post_cards(posts, current_user, with_comments=False)
+    if request.args.get('partial'):
+        return render_template('main/_profile_post_list.html', cards=cards, next_url=next_url)
+    post_count = cache.get_or_set(post_count_key(user.id), user.posts.count, fragment_ttl())
+    return render_template('main/profile.html', user=user, cards=cards, next_url=next_url, post_count=post_count)
+
+AVATAR_MAX_AGE = 365 * 24 * 3600
+
+@bp.route('/avatar/<username>.svg')
+def avatar(username):
+    # Avatar padrão (iniciais): sem login e com cache longo, pois só depende do nome
+    svg, etag = avatars.render(username)
+    response = current_app.response_class(svg, mimetype='image/svg+xml')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = AVATAR_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+@bp.route('/avatar/u/<filename>')
+def uploaded_avatar(filename):
+    # Fotos enviadas: o nome do arquivo muda a cada envio, então pode ficar em cache
+    response = send_from_directory(current_app.config['AVATAR_FOLDER'], filename,
+                                   max_age=AVATAR_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 @bp.route('/user/edit', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
     if request.method == 'POST':
+        old_username = current_user.username
+        old_avatar = current_user.avatar_file
         current_user.username = request.form.get('username')
         current_user.about_me = request.form.get('about_me')
         current_user.job_title = request.form.get('job_title')
@@ -259,11 +287,20 @@ def edit_profile():
             if not os.path.exists(current_app.config['AVATAR_FOLDER']):
                 os.makedirs(current_app.config['AVATAR_FOLDER'])
             if ext in ['png', 'jpg', 'jpeg', 'gif']:
-                filename = f"user_{current_user.id}.{ext}"
+                # Nome novo a cada envio: a URL muda e o cache longo nunca mostra a foto antiga
+                filename = f"user_{current_user.id}_{secrets.token_hex(6)}.{ext}"
                 file.save(os.path.join(current_app.config['AVATAR_FOLDER'], filename))
                 current_user.avatar_file = filename
+        invalidate_users()
         try:
             db.session.commit()
+            if current_user.username != old_username:
+                usernames.rename(current_user.id, current_user.username)
+            if old_avatar and old_avatar != current_user.avatar_file:
+                try:
+                    os.remove(os.path.join(current_app.config['AVATAR_FOLDER'], old_avatar))
+                except OSError:
+                    pass
             flash('Perfil atualizado!')
             return redirect(url_for('main.profile', username=current_user.username))
         except:
@@ -276,7 +313,7 @@ def edit_profile():
 def admin_panel():
     users = User.query.all()
     posts_count = Post.query.count()
-    reported_posts = Post.query.filter_by(status='denunciada').all()
+    reported_posts = reported_posts_query().all()
     return render_template('main/admin_panel.html', users=users, posts_count=posts_count, reported_posts=reported_posts)
 
 @bp.route('/post/<int:post_id>/report', methods=['POST'])
@@ -306,6 +343,7 @@ def unreport_post(post_id):
 @admin_required
 def remove_post(post_id):
     post = Post.query.get_or_404(post_id)
+    invalidate_post(post.id, author_id=post.user_id)
     db.session.delete(post)
     db.session.commit()
     flash('Publicação removida com sucesso.')
@@ -319,7 +357,9 @@ def change_role(user_id):
     new_role = request.form.get('role')
     if new_role in ['student', 'professor', 'admin']:
         user.role = new_role
+        invalidate_users()
         db.session.commit()
+        ranking.invalidate()  # admins ficam fora do ranking
         flash(f'Cargo de {user.username} alterado para {new_role}.')
     return redirect(url_for('main.admin_panel'))
 
@@ -328,35 +368,74 @@ def change_role(user_id):
 def search():
     query = request.args.get('q', '').strip()
     if not query: return redirect(url_for('main.index'))
-    users = User.query.filter(User.username.ilike(f'%{query}%')).all()
-    posts = Post.query.filter((Post.title.ilike(f'%{query}%')) | (Post.body.ilike(f'%{query}%'))).all()
-    return render_template('main/search_results.html', query=query, users=users, posts=posts)
+    users = search_users(query)
+    results = search_posts(query)
+    cards = load_post_cards([post for post, _ in results], current_user, with_comments=False)
+    snippets = {post.id: snippet for post, snippet in results}
+    return render_template('main/search_results.html', query=query, users=users, cards=cards, snippets=snippets)
 
 @bp.route('/search/live')
 @login_required
 def search_live():
     query = request.args.get('q', '').strip()
     if not query or len(query) < 2: return jsonify({'users': [], 'posts': []})
-    users = User.query.filter(User.username.ilike(f'%{query}%')).limit(3).all()
-    users_data = [{'username': u.username, 'level': u.level} for u in users]
-    posts = Post.query.filter((Post.title.ilike(f'%{query}%')) | (Post.body.ilike(f'%{query}%'))).limit(5).all()
-    posts_data = [{'id': p.id, 'title': p.title, 'type': p.type} for p in posts]
+    # Nomes de usuário vêm do índice em memória (prefixo, ordenados por XP)
+    users_data = [{'username': name, 'level': level_for_xp(xp), 'avatar': url_for('main.avatar', username=name)}
+                  for name, xp in usernames.suggest(query, limit=3)]
+    posts = search_posts(query, limit=5, prefix=True)
+    posts_data = [{'id': p.id, 'title': p.title, 'type': p.type} for p, _ in posts]
     return jsonify({'users': users_data, 'posts': posts_data})
 
 @bp.route('/notifications')
 @login_required
 def notifications():
-    notifs = current_user.notifications.order_by(Notification.timestamp.desc()).all()
-    for n in notifs: n.is_read = True
+    notifs, next_cursor = paginate(notifications_query(current_user), Notification, request.args.get('cursor'),
+                                   current_app.config['NOTIFICATIONS_PER_PAGE'])
+    next_url = url_for('main.notifications', cursor=next_cursor, partial=1) if next_cursor else None
+
+    # Marca como lidas só as notificações exibidas, num único UPDATE (e o
+    # contador junto). O commit vem depois de renderizar, assim os objetos já
+    # carregados não expiram e continuam destacados como novos nesta visita.
+    unread_ids = [n.id for n in notifs if not n.is_read]
+    if unread_ids:
+        marked = db.session.execute(
+            db.update(Notification)
+            .where(Notification.id.in_(unread_ids), Notification.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)).rowcount
+        db.session.execute(
+            db.update(User).where(User.id == current_user.id)
+            .values(unread_notifications=User.unread_notifications - marked)
+            .execution_options(synchronize_session=False))
+        set_committed_value(current_user, 'unread_notifications',
+                            max(current_user.new_notifications() - marked, 0))
+        invalidate_session_user(current_user.id)
+
+    template = 'main/_notification_list.html' if request.args.get('partial') else 'main/notifications.html'
+    html = render_template(template, notifications=notifs, next_url=next_url)
+    db.session.commit()
+    return html
+
+@bp.route('/notifications/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    db.session.execute(mark_all_read_statement(current_user.id))
+    current_user.unread_notifications = 0
     db.session.commit()
-    return render_template('main/notifications.html', notifications=notifs)
+    return redirect(url_for('main.notifications'))
+
+@bp.route('/notifications/unread')
+@login_required
+def notifications_unread():
+    # Usado pela navbar para atualizar o badge sem recarregar a página
+    return jsonify({'unread': current_user.new_notifications()})
 
 # --- SISTEMA DE MASCOTES ---
 @bp.route('/mascotes')
 @login_required
 def mascotes():
     # Pega todas as mascotes disponíveis
-    mascotes_disponiveis = Mascote.query.order_by(Mascote.tipo, Mascote.evolucao).all()
+    mascotes_disponiveis = catalog.mascotes()
     
     # Verifica se usuário já tem mascote
     mascote_usuario = MascoteUsuario.query.filter_by(user_id=current_user.id).first()
@@ -377,9 +456,12 @@ def mascotes():
             db.session.commit()
             flash(f'🏆 Sua mascote evoluiu para o estágio {evolucao_calculada}!')
     
+    mascote_atual = catalog.mascote_by_id(mascote_usuario.mascote_id) if mascote_usuario else None
+
     return render_template('main/mascotes.html', 
                          mascotes=mascotes_disponiveis, 
-                         mascote_usuario=mascote_usuario)
+                         mascote_usuario=mascote_usuario,
+                         mascote_atual=mascote_atual)
 
 @bp.route('/mascotes/adotar/<int:mascote_id>', methods=['POST'])
 @login_required
@@ -391,8 +473,8 @@ def adotar_mascote(mascote_id):
         return redirect(url_for('main.mascotes'))
     
     # Verifica se mascote existe e é evolução 1
-    mascote = Mascote.query.filter_by(id=mascote_id, evolucao=1).first()
-    if not mascote:
+    mascote = catalog.mascote_by_id(mascote_id)
+    if not mascote or mascote.evolucao != 1:
         flash('Mascote inválida!')
         return redirect(url_for('main.mascotes'))
     
@@ -1,22 +1,36 @@
 from datetime import datetime
-from flask import url_for
+from flask import current_app, url_for
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 from app import db, login
+from app.uow import xp_committed
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from math import floor, sqrt
 
-# Tabelas de Associação
+# Tabelas de Associação (chave primária composta: sem linhas duplicadas e
+# "já curtiu?"/"já tem a conquista?" viram uma busca pela chave)
 post_likes = db.Table('post_likes',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('post_id', db.Integer, db.ForeignKey('post.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
+    db.Index('ix_post_likes_post_id', 'post_id')
 )
 
 user_achievements = db.Table('user_achievements',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('achievement_id', db.Integer, db.ForeignKey('achievement.id')),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('achievement_id', db.Integer, db.ForeignKey('achievement.id'), primary_key=True),
     db.Column('unlocked_at', db.DateTime, default=datetime.utcnow)
 )
 
+def level_for_xp(xp):
+    if xp is None or xp < 10: return 1
+    calculated_level = int(floor(sqrt(xp / 10)))
+    return 100 if calculated_level > 100 else calculated_level
+
+def xp_for_level(level):
+    """XP mínimo para chegar ao nível (inverso de level_for_xp)"""
+    return 0 if level <= 1 else 10 * level * level
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), index=True, unique=True)
@@ -31,15 +45,14 @@ class User(UserMixin, db.Model):
     job_title = db.Column(db.String(100))
     linkedin = db.Column(db.String(200))
 
-    # Limites
-    daily_likes = db.Column(db.Integer, default=0)
-    daily_comments = db.Column(db.Integer, default=0)
-    last_activity_reset = db.Column(db.DateTime, default=datetime.utcnow)
+    # Notificações não lidas (mantido pelos eventos de Notification abaixo)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relacionamentos
     posts = db.relationship('Post', backref='author', lazy='dynamic')
     comments = db.relationship('Comment', backref='author', lazy='dynamic')
-    liked_posts = db.relationship('Post', secondary=post_likes, backref=db.backref('liked_by', lazy='dynamic'))
+    liked_posts = db.relationship('Post', secondary=post_likes, lazy='dynamic',
+                                  backref=db.backref('liked_by', lazy='dynamic'))
     notifications = db.relationship('Notification', foreign_keys='Notification.recipient_id', backref='recipient', lazy='dynamic')
     
     # NOVO: Conquistas
@@ -48,6 +61,9 @@ class User(UserMixin, db.Model):
     # NOVO: Mascotes
     mascote_atual = db.relationship('MascoteUsuario', backref='dono', lazy='dynamic')
 
+    # Histórico de XP (o total materializado fica em `xp`)
+    xp_events = db.relationship('XpEvent', backref='user', lazy='dynamic')
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
 
@@ -56,24 +72,25 @@ class User(UserMixin, db.Model):
 
     @property
     def level(self):
-        if self.xp is None or self.xp < 10: return 1
-        calculated_level = int(floor(sqrt(self.xp / 10)))
-        return 100 if calculated_level > 100 else calculated_level
+        return level_for_xp(self.xp)
 
     @property
     def avatar(self):
         if self.avatar_file:
-            return url_for('static', filename='uploads/avatars/' + self.avatar_file)
-        return f"https://ui-avatars.com/api/?name={self.username}&background=171717&color=fff&bold=true&size=128"
+            return url_for('main.uploaded_avatar', filename=self.avatar_file)
+        return url_for('main.avatar', username=self.username)
 
     def new_notifications(self):
-        return Notification.query.filter_by(recipient_id=self.id, is_read=False).count()
+        return self.unread_notifications or 0
 
-    def add_xp(self, amount):
-        if self.xp is None: self.xp = 0
-        self.xp += amount
-        db.session.add(self)
-        db.session.commit()
+    def add_xp(self, amount, reason=None, source=None):
+        # Não faz commit: o evento vai para o histórico (xp_events) e o total é
+        # somado junto com o resto da requisição (app/uow.py)
+        from app.uow import current_uow
+        current_uow().add_xp(self, amount, reason, source)
+        # Conquistas que dependem de XP (ex.: scholar)
+        from app.achievements import dispatch, XP_CHANGED
+        dispatch(XP_CHANGED, self)
     
     @property
     def is_admin(self): return self.role == 'admin'
@@ -83,8 +100,56 @@ class User(UserMixin, db.Model):
 
     def __repr__(self): return f'<User {self.username}>'
 
+# --- CACHE DO USUÁRIO DA SESSÃO ---
+# O user_loader roda em toda requisição autenticada. Com um cache compartilhado
+# entre os processos (CACHE_TYPE=filesystem), guardamos um retrato das
+# colunas do usuário (menos a senha) por USER_CACHE_TTL segundos e, a partir
+# dele, colocamos na sessão um User persistente sem fazer SELECT: relações
+# (curtidas, conquistas...) e escritas funcionam como antes, e o que ficou de
+# fora do retrato é lido do banco só se alguém pedir. Mudanças de perfil,
+# cargo, XP e notificações descartam o retrato depois do commit.
+_SNAPSHOT_EXCLUDE = {'password_hash'}
+
+def _session_user_key(user_id):
+    return f'session_user:{user_id}'
+
+def _snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in db.inspect(User).column_attrs
+            if attr.key not in _SNAPSHOT_EXCLUDE}
+
+def invalidate_session_user(user_id):
+    """Descarta o retrato do usuário quando a transação atual for gravada"""
+    from app.cache import cache
+    from app.uow import current_uow
+    current_uow().after_commit(lambda: cache.delete(_session_user_key(user_id)))
+
 @login.user_loader
-def load_user(id): return User.query.get(int(id))
+def load_user(id):
+    from app.cache import cache
+    # Num cache por processo, a invalidação só chegaria ao processo que fez a
+    # mudança: um admin rebaixado seguiria admin nos outros até o TTL vencer
+    if not cache.shared:
+        return db.session.get(User, int(id))
+    key = _session_user_key(int(id))
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = db.session.get(User, int(id))
+        if user is not None:
+            cache.set(key, _snapshot(user), current_app.config.get('USER_CACHE_TTL'))
+        return user
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    invalidate_session_user(target.id)
+
+@xp_committed.connect
+def _on_xp_committed(sender, events):
+    from app.cache import cache
+    for user_id in {ev['user_id'] for ev in events}:
+        cache.delete(_session_user_key(user_id))
 
 # --- NOVA CLASSE: CONQUISTA ---
 class Achievement(db.Model):
@@ -95,6 +160,23 @@ class Achievement(db.Model):
     xp_reward = db.Column(db.Integer)
     icon = db.Column(db.String(50)) # Classe do Bootstrap Icon (ex: 'bi-star')
 
+# --- HISTÓRICO DE XP ---
+# Só recebe INSERTs (em lote, no commit da requisição). User.xp é o total
+# materializado; `flask xp recompute` refaz o total a partir daqui.
+class XpEvent(db.Model):
+    __tablename__ = 'xp_events'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50))       # post, material, comment, like_received, achievement...
+    source_type = db.Column(db.String(20))  # tabela do objeto que gerou o XP (post, comment...)
+    source_id = db.Column(db.Integer)
+    subject = db.Column(db.String(50))      # matéria do post de origem (rankings por matéria)
+    timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_xp_events_user_timestamp', 'user_id', 'timestamp'),
+                      db.Index('ix_xp_events_subject_timestamp', 'subject', 'timestamp'))
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -103,10 +185,36 @@ class Notification(db.Model):
     action = db.Column(db.String(50))
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     is_read = db.Column(db.Boolean, default=False)
+    __table_args__ = (db.Index('ix_notification_recipient_read_timestamp', 'recipient_id', 'is_read', 'timestamp'),
+                      db.Index('ix_notification_recipient_timestamp', 'recipient_id', 'timestamp'))
     sender = db.relationship('User', foreign_keys=[sender_id])
     post = db.relationship('Post', foreign_keys=[post_id])
     # silence SAWarning about overlapping relationships with Post.notifications
     post = db.relationship('Post', foreign_keys=[post_id], overlaps='notifications')
+
+# --- CONTADOR DE NÃO LIDAS ---
+# Toda notificação criada (ou apagada sem ter sido lida) ajusta
+# user.unread_notifications no mesmo flush, então o badge não precisa de COUNT.
+def _bump_unread(connection, user_id, delta):
+    users = User.__table__
+    connection.execute(users.update().where(users.c.id == user_id)
+                       .values(unread_notifications=users.c.unread_notifications + delta))
+    invalidate_session_user(user_id)
+
+@event.listens_for(Notification, 'after_insert')
+def _notification_inserted(mapper, connection, target):
+    if not target.is_read and target.recipient_id is not None:
+        _bump_unread(connection, target.recipient_id, 1)
+        # Avisa o destinatário conectado (enviado só depois do commit)
+        from app.realtime import publish, user_room
+        publish('notification', {'action': target.action, 'post_id': target.post_id,
+                                 'sender': target.sender.username if target.sender else None},
+                user_room(target.recipient_id))
+
+@event.listens_for(Notification, 'after_delete')
+def _notification_deleted(mapper, connection, target):
+    if not target.is_read and target.recipient_id is not None:
+        _bump_unread(connection, target.recipient_id, -1)
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(140))
@@ -115,15 +223,50 @@ class Post(db.Model):
     subject = db.Column(db.String(50), default='Geral')
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     filename = db.Column(db.String(255))
+    # Anexo guardado por conteúdo (app.storage); posts antigos só têm filename
+    blob_hash = db.Column(db.String(64), db.ForeignKey('blob.hash'), index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     status = db.Column(db.String(20), default='normal') # normal | denunciada | removida
+    # Contadores desnormalizados: atualizados junto com a curtida/comentário,
+    # para que as páginas nunca precisem de COUNT(*). `flask reconcile-counters` corrige desvios.
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade="all, delete-orphan")
     # 'notifications' and Notification.post both reference post.id -> notification.post_id
     # create an explicit backref with overlaps to silence SAWarning and make intent explicit
     notifications = db.relationship('Notification', backref=db.backref('related_post', overlaps='post'), lazy='dynamic', cascade="all, delete-orphan", overlaps='post')
 
+    # Feed por matéria, posts do perfil e painel de denúncias (todos ordenados por data)
+    __table_args__ = (db.Index('ix_post_subject_timestamp', 'subject', 'timestamp'),
+                      db.Index('ix_post_user_id_timestamp', 'user_id', 'timestamp'),
+                      db.Index('ix_post_status', 'status'))
+
     @property
-    def likes_count(self): return self.liked_by.count()
+    def likes_count(self): return self.like_count or 0
+
+# --- ANEXOS (armazenamento por conteúdo) ---
+class Blob(db.Model):
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 do conteúdo
+    size = db.Column(db.BigInteger, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)  # último upload com esse conteúdo
+
+# Cada post que aponta para um blob conta uma referência; blobs sem referência
+# são apagados (arquivo e linha) por `flask uploads gc`.
+def _bump_blob(connection, blob_hash, delta):
+    blobs = Blob.__table__
+    connection.execute(blobs.update().where(blobs.c.hash == blob_hash)
+                       .values(refcount=blobs.c.refcount + delta))
+
+@event.listens_for(Post, 'after_insert')
+def _post_inserted(mapper, connection, target):
+    if target.blob_hash:
+        _bump_blob(connection, target.blob_hash, 1)
+
+@event.listens_for(Post, 'after_delete')
+def _post_deleted(mapper, connection, target):
+    if target.blob_hash:
+        _bump_blob(connection, target.blob_hash, -1)
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -133,6 +276,9 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     post_id = db.Column(db.Integer, db.ForeignKey('post.id'))
 
+    # Comentários dos cards, já na ordem de exibição
+    __table_args__ = (db.Index('ix_comment_post_id_timestamp', 'post_id', 'timestamp'),)
+
 # --- NOVO SISTEMA: MASCOTES ---
 class Mascote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -143,6 +289,9 @@ class Mascote(db.Model):
     imagem = db.Column(db.String(100))  # caminho da imagem
     descricao = db.Column(db.String(200))
 
+    # Um estágio por tipo: é a chave do upsert de `flask seed reference`
+    __table_args__ = (db.UniqueConstraint('tipo', 'evolucao', name='uq_mascote_tipo_evolucao'),)
+
 class MascoteUsuario(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -152,4 +301,15 @@ class MascoteUsuario(db.Model):
     
     # Relacionamentos
     usuario = db.relationship('User', overlaps="dono,mascote_atual")
-    mascote = db.relationship('Mascote')
\ No newline at end of file
+    mascote = db.relationship('Mascote')
+# --- CHAT DE ESTUDOS ---
+class ChatMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(50), nullable=False)  # uma sala por matéria
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    body = db.Column(db.String(500), nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_chat_message_subject_timestamp', 'subject', 'timestamp'),)
+
+    author = db.relationship('User')
@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached, with_parent
+from app import db
+from app.leaderboard import subject_totals_query
+from app.main.feed import comments_query, feed_query, liked_ids_query, mark_all_read_statement, \
+    notifications_query, page_query, reported_posts_query
+from app.models import Achievement, Notification, Post, User
+
+# --- PLANOS DAS CONSULTAS MAIS USADAS ---
+# Cada verificação monta a consulta com as mesmas funções que as rotas usam e
+# confere, com EXPLAIN QUERY PLAN (SQLite), que ela usa o índice esperado. Se
+# alguém remover um índice ou mudar a consulta e o banco voltar a varrer a
+# tabela inteira, `flask check-query-plans` falha.
+
+_NOW = datetime(2025, 1, 1)
+
+def checks():
+    """[(descrição, consulta, índice esperado)]"""
+    from app.commands import post_counter_updates
+    # Usuário só com o id, preso à sessão sem SELECT (como no load_user)
+    user = User(id=1)
+    make_transient_to_detached(user)
+    user = db.session.merge(user, load=False)
+    likes_update, _ = post_counter_updates()
+    return [
+        ('feed (página seguinte)', page_query(feed_query(), Post, (_NOW, 100)), 'ix_post_timestamp'),
+        ('feed por matéria', page_query(feed_query('Geral'), Post), 'ix_post_subject_timestamp'),
+        ('posts do perfil', page_query(user.posts, Post), 'ix_post_user_id_timestamp'),
+        ('denúncias do painel', reported_posts_query(), 'ix_post_status'),
+        ('comentários dos cards', comments_query([1, 2, 3]), 'ix_comment_post_id_timestamp'),
+        ('curtidas do usuário na página', liked_ids_query(1, [1, 2, 3]), 'pk_post_likes'),
+        ('recontagem das curtidas', likes_update, 'ix_post_likes_post_id'),
+        ('conquistas do usuário', select(Achievement).where(with_parent(user, User.achievements)),
+         'pk_user_achievements'),
+        ('notificações (lista)', page_query(notifications_query(user), Notification, per_page=30),
+         'ix_notification_recipient_timestamp'),
+        ('marcar notificações como lidas', mark_all_read_statement(1),
+         'ix_notification_recipient_read_timestamp'),
+        ('ranking por matéria', subject_totals_query(db.session), 'ix_xp_events_subject_timestamp'),
+    ]
+
+def _statement(query):
+    return query.statement if hasattr(query, 'statement') else query
+
+def explain(query):
+    """Linhas do EXPLAIN QUERY PLAN (texto de cada passo) da consulta"""
+    compiled = _statement(query).compile(dialect=db.engine.dialect,
+                                         compile_kwargs={'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + compiled.string, params).all()
+    return [row[-1] for row in rows]
+
+def _uses_index(plan, index):
+    # A chave primária composta aparece como sqlite_autoindex_<tabela>_1
+    names = {index}
+    if index.startswith('pk_'):
+        names.add(f'sqlite_autoindex_{index[3:]}_1')
+    return any(f'INDEX {name}' in step for step in plan for name in names)
+
+def check_query_plans():
+    """[(descrição, índice esperado, plano, ok)] de cada verificação"""
+    results = []
+    for description, query, index in checks():
+        plan = explain(query)
+        results.append((description, index, plan, _uses_index(plan, index)))
+    return results
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app
+
+# --- LIMITES DE USO (CURTIDAS, COMENTÁRIOS...) ---
+# Contadores por janela fixa de tempo: a chave guarda quando a janela atual
+# termina e quantas vezes a ação foi usada nela. Janela vencida conta como zero
+# e é reiniciada no próximo uso, então nada precisa ser gravado para "zerar"
+# os limites. Os limites ficam em RATE_LIMITS (por ação e por cargo).
+
+def _window_end(period, now):
+    """Fim da janela atual; janelas alinhadas ao relógio (86400 = meia-noite UTC)"""
+    return (int(now) // period + 1) * period
+
+class MemoryBackend:
+    """Contadores no processo (um servidor, ou limites aproximados por processo)"""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # chave -> [fim_da_janela, usos]
+        self._hits = 0
+
+    def hit(self, key, limit, period):
+        """Conta um uso se ainda couber no limite; retorna True se permitido"""
+        now = time.time()
+        end = _window_end(period, now)
+        with self._lock:
+            self._hits += 1
+            if self._hits % self.PRUNE_EVERY == 0:
+                self._counters = {k: v for k, v in self._counters.items() if v[0] > now}
+            counter = self._counters.get(key)
+            if counter is None or counter[0] != end:
+                counter = self._counters[key] = [end, 0]
+            if counter[1] >= limit:
+                return False
+            counter[1] += 1
+            return True
+
+    def used(self, key, period):
+        end = _window_end(period, time.time())
+        counter = self._counters.get(key)
+        return counter[1] if counter is not None and counter[0] == end else 0
+
+class SQLiteBackend:
+    """Contadores num arquivo SQLite próprio, compartilhado entre processos.
+
+    Cada uso é um único upsert atômico (fora da transação da requisição); o
+    WHERE do DO UPDATE impede passar do limite mesmo com acessos simultâneos.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            "key TEXT PRIMARY KEY, window_end INTEGER NOT NULL, count INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        end = _window_end(period, now)
+        conn = self._conn()
+        self._hits += 1
+        if self._hits % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limit WHERE window_end <= ?", (int(now),))
+        row = conn.execute(
+            "INSERT INTO rate_limit (key, window_end, count) VALUES (:key, :end, 1) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN window_end = excluded.window_end THEN count + 1 ELSE 1 END, "
+            "window_end = excluded.window_end "
+            "WHERE window_end <> excluded.window_end OR count < :limit "
+            "RETURNING count",
+            {'key': key, 'end': end, 'limit': limit}).fetchone()
+        return row is not None and row[0] <= limit
+
+    def used(self, key, period):
+        end = _window_end(period, time.time())
+        row = self._conn().execute(
+            "SELECT count FROM rate_limit WHERE key = ? AND window_end = ?", (key, end)).fetchone()
+        return row[0] if row else 0
+
+class RateLimiter:
+    """Fachada usada pelas rotas; o backend de cada aplicação fica em app.extensions"""
+
+    def init_app(self, app):
+        if app.config.get('RATELIMIT_BACKEND') == 'sqlite':
+            app.extensions['ratelimit'] = SQLiteBackend(app.config['RATELIMIT_SQLITE_PATH'])
+        else:
+            app.extensions['ratelimit'] = MemoryBackend()
+
+        @app.context_processor
+        def inject_rate_limits():
+            return dict(rate_limited=self.exhausted)
+
+    @property
+    def backend(self):
+        return current_app.extensions['ratelimit']
+
+    def limit_for(self, action, user):
+        """(usos, segundos) da ação para o cargo do usuário, ou None se não há limite"""
+        rules = current_app.config.get('RATE_LIMITS', {}).get(action) or {}
+        return rules.get(getattr(user, 'role', None), rules.get('default'))
+
+    def _key(self, action, user):
+        return f'{action}:{user.id}'
+
+    def hit(self, action, user):
+        """Registra um uso da ação; False se o usuário já atingiu o limite"""
+        rule = self.limit_for(action, user)
+        if rule is None:
+            return True
+        limit, period = rule
+        return self.backend.hit(self._key(action, user), limit, period)
+
+    def remaining(self, action, user):
+        """Usos que ainda restam na janela atual (None = sem limite), sem gravar nada"""
+        rule = self.limit_for(action, user)
+        if rule is None:
+            return None
+        limit, period = rule
+        return max(limit - self.backend.used(self._key(action, user), period), 0)
+
+    def exhausted(self, action, user):
+        return user.is_authenticated and self.remaining(action, user) == 0
+
+limiter = RateLimiter()
@@ -0,0 +1,17 @@
+from app import socketio
+from app.uow import current_uow
+
+# --- EVENTOS EM TEMPO REAL ---
+# Cada usuário conectado fica na sala user_<id> e entra em post_<id> para os
+# posts que está vendo. As rotas publicam só o que mudou (deltas pequenos), e
+# o envio acontece depois do commit: se a transação falhar, nada é enviado.
+
+def user_room(user_id):
+    return f'user_{user_id}'
+
+def post_room(post_id):
+    return f'post_{post_id}'
+
+def publish(event, data, room):
+    """Envia o evento para a sala quando a transação atual for gravada"""
+    current_uow().after_commit(lambda: socketio.emit(event, data, to=room))
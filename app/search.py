@@ -0,0 +1,116 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from app import db
+from app.models import Post, User
+
+# --- BUSCA ---
+# No SQLite usamos índices FTS5 (post_fts e user_fts) mantidos por triggers,
+# então criar/editar/apagar posts já atualiza a busca. Os resultados vêm
+# ordenados por relevância (bm25) e com trecho destacado. Em outros bancos
+# (ou se o índice ainda não foi criado) caímos no ILIKE de antes.
+
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5("
+    "title, body, content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5("
+    "username, content='user', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF title, body ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN "
+    "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF username ON user BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); "
+    "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END",
+]
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Filtro do Alembic: o autogenerate não deve tentar apagar as tabelas do FTS5"""
+    return not (type_ == 'table' and reflected and name.startswith(('post_fts', 'user_fts')))
+
+# Marcadores do trecho destacado (trocados por <mark> depois de escapar o HTML)
+_HL_START, _HL_END = '\x02', '\x03'
+
+_fts_available = {}
+
+def fts_available():
+    """True se o banco é SQLite e os índices FTS5 existem (verificado uma vez)"""
+    engine = db.engine
+    if engine.url not in _fts_available:
+        ok = False
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                ok = conn.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE name IN ('post_fts', 'user_fts')")).scalar() == 2
+        _fts_available[engine.url] = ok
+    return _fts_available[engine.url]
+
+def rebuild_index():
+    """Cria (se preciso) e reconstrói os índices FTS5 a partir das tabelas"""
+    for ddl in FTS_DDL:
+        db.session.execute(text(ddl))
+    db.session.execute(text("INSERT INTO post_fts(post_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO user_fts(user_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    _fts_available.pop(db.engine.url, None)
+
+def fts_query(query, prefix=False):
+    """Converte o texto digitado numa consulta FTS5 segura (termos entre aspas, E lógico)"""
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    parts = ['"%s"' % t for t in terms]
+    if prefix:
+        parts[-1] += '*'  # busca ao vivo: a última palavra ainda está sendo digitada
+    return ' '.join(parts)
+
+def _highlight(snippet):
+    return Markup(str(escape(snippet)).replace(_HL_START, '<mark>').replace(_HL_END, '</mark>'))
+
+def _truncate(body, size=200):
+    body = body or ''
+    return body[:size] + ('...' if len(body) > size else '')
+
+def _ordered(model, ids):
+    objs = {o.id: o for o in model.query.filter(model.id.in_(ids))} if ids else {}
+    return [objs[i] for i in ids if i in objs]
+
+def search_posts(query, limit=50, prefix=False):
+    """[(post, trecho)] ordenados por relevância (por data na busca por prefixo)"""
+    if fts_available():
+        match = fts_query(query, prefix)
+        if not match:
+            return []
+        # A busca ao vivo (prefixo, a cada tecla) casa com boa parte do acervo
+        # ("de"*): ordenar por bm25 pontuaria tudo antes do LIMIT. Pelo rowid
+        # (mais recentes primeiro) o FTS5 para assim que acha `limit` posts.
+        order = 'rowid DESC' if prefix else 'bm25(post_fts, 10.0, 1.0)'
+        rows = db.session.execute(text(
+            "SELECT rowid, snippet(post_fts, 1, :hs, :he, '…', 16) FROM post_fts "
+            f"WHERE post_fts MATCH :q ORDER BY {order} LIMIT :n"),
+            {'q': match, 'n': limit, 'hs': _HL_START, 'he': _HL_END}).all()
+        snippets = {pid: _highlight(snip) for pid, snip in rows}
+        return [(p, snippets[p.id]) for p in _ordered(Post, [pid for pid, _ in rows])]
+
+    posts = (Post.query.filter((Post.title.ilike(f'%{query}%')) | (Post.body.ilike(f'%{query}%')))
+             .order_by(Post.timestamp.desc()).limit(limit).all())
+    return [(p, _truncate(p.body)) for p in posts]
+
+def search_users(query, limit=20, prefix=True):
+    """Usuários cujo nome combina com a busca, por relevância"""
+    if fts_available():
+        match = fts_query(query, prefix)
+        if not match:
+            return []
+        ids = db.session.execute(text(
+            "SELECT rowid FROM user_fts WHERE user_fts MATCH :q ORDER BY rank LIMIT :n"),
+            {'q': match, 'n': limit}).scalars().all()
+        return _ordered(User, ids)
+    return User.query.filter(User.username.ilike(f'%{query}%')).limit(limit).all()
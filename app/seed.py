@@ -0,0 +1,79 @@
+import os
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.catalog import catalog
+from app.models import Achievement, Mascote, User
+
+# --- DADOS DE REFERÊNCIA (flask seed ...) ---
+# Conquistas e mascotes são gravadas com um único upsert cada: o que já existe
+# é atualizado no lugar (mesmo id, então MascoteUsuario e user_achievements
+# continuam apontando para a linha certa) e o que falta é inserido. Rodar de
+# novo não muda nada. Nada disso roda mais ao iniciar o servidor.
+
+ACHIEVEMENTS = [
+    {'key': 'welcome', 'name': 'Bem-vindo a Bordo', 'description': 'Crie sua conta no BrainShare.', 'xp_reward': 50, 'icon': 'bi-door-open-fill'},
+    {'key': 'first_post', 'name': 'Primeira Voz', 'description': 'Faça sua primeira publicação.', 'xp_reward': 100, 'icon': 'bi-megaphone-fill'},
+    {'key': 'influencer', 'name': 'Influenciador', 'description': 'Receba 10 curtidas em um post.', 'xp_reward': 300, 'icon': 'bi-stars'},
+    {'key': 'helper', 'name': 'Mão Amiga', 'description': 'Faça 5 comentários ajudando outros.', 'xp_reward': 150, 'icon': 'bi-chat-heart-fill'},
+    {'key': 'scholar', 'name': 'Erudito', 'description': 'Chegue ao Nível 5.', 'xp_reward': 500, 'icon': 'bi-mortarboard-fill'},
+]
+
+MASCOTES = [
+    # SERPENTE DA SABEDORIA
+    {'nome': 'Serpente Bebê', 'tipo': 'sabedoria', 'evolucao': 1, 'xp_necessario': 0, 'imagem': 'serpente1.png', 'descricao': 'Uma pequena serpente curiosa, sempre buscando conhecimento!'},
+    {'nome': 'Serpente Jovem', 'tipo': 'sabedoria', 'evolucao': 2, 'xp_necessario': 30, 'imagem': 'serpente2.png', 'descricao': 'Suas escamas brilham com sabedoria acumulada.'},
+    {'nome': 'Serpente Anciã', 'tipo': 'sabedoria', 'evolucao': 3, 'xp_necessario': 60, 'imagem': 'serpente3.png', 'descricao': 'Uma guardiã da sabedoria ancestral, mestre do conhecimento!'},
+
+    # FÊNIX DA ESPERANÇA
+    {'nome': 'Fênix Bebê', 'tipo': 'esperanca', 'evolucao': 1, 'xp_necessario': 0, 'imagem': 'fenix1.png', 'descricao': 'Uma pequena ave flamejante cheia de esperança e energia!'},
+    {'nome': 'Fênix Jovem', 'tipo': 'esperanca', 'evolucao': 2, 'xp_necessario': 30, 'imagem': 'fenix2.png', 'descricao': 'Suas asas começam a brilhar com fogo renovador.'},
+    {'nome': 'Fênix Ancião', 'tipo': 'esperanca', 'evolucao': 3, 'xp_necessario': 60, 'imagem': 'fenix3.png', 'descricao': 'Um majestoso pássaro de fogo, símbolo eterno da esperança!'},
+
+    # ZEBRA DO EQUILÍBRIO
+    {'nome': 'Zebra Bebê', 'tipo': 'equilibrio', 'evolucao': 1, 'xp_necessario': 0, 'imagem': 'zebra1.png', 'descricao': 'Uma zebrinha brincalhona que busca harmonia em tudo!'},
+    {'nome': 'Zebra Jovem', 'tipo': 'equilibrio', 'evolucao': 2, 'xp_necessario': 30, 'imagem': 'zebra2.png', 'descricao': 'Suas listras representam o perfeito equilíbrio.'},
+    {'nome': 'Zebra Anciã', 'tipo': 'equilibrio', 'evolucao': 3, 'xp_necessario': 60, 'imagem': 'zebra3.png', 'descricao': 'Uma guardiã do equilíbrio cósmico, mantenedora da harmonia!'},
+]
+
+def _insert(model):
+    """INSERT com suporte a ON CONFLICT do banco atual (SQLite ou PostgreSQL)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    raise RuntimeError(f'Upsert não suportado no banco {dialect}.')
+
+def _upsert(model, rows, keys):
+    stmt = _insert(model).values(rows)
+    updated = {col: stmt.excluded[col] for col in rows[0] if col not in keys}
+    db.session.execute(stmt.on_conflict_do_update(index_elements=keys, set_=updated))
+
+def seed_achievements():
+    _upsert(Achievement, ACHIEVEMENTS, ['key'])
+    db.session.commit()
+    catalog.invalidate()
+    return len(ACHIEVEMENTS)
+
+def seed_mascotes():
+    _upsert(Mascote, MASCOTES, ['tipo', 'evolucao'])
+    db.session.commit()
+    catalog.invalidate()
+    return len(MASCOTES)
+
+def seed_admin(email='admin@brainshare.com', password=None):
+    """Cria o admin se ainda não existir; retorna True se criou"""
+    admin = User(username='Admin', email=email, role='admin', job_title='Administrador')
+    admin.set_password(password or os.environ.get('ADMIN_PASSWORD') or 'admin123')
+    stmt = (_insert(User).values(username=admin.username, email=admin.email, role=admin.role,
+                                 job_title=admin.job_title, password_hash=admin.password_hash, xp=0)
+            .on_conflict_do_nothing(index_elements=['email'])
+            .returning(User.id))
+    admin_id = db.session.execute(stmt).scalar()
+    if admin_id is None:
+        db.session.rollback()
+        return False
+    # passa pelo histórico de XP para que `flask xp recompute` não zere o admin
+    db.session.get(User, admin_id).add_xp(5000, 'opening_balance')
+    db.session.commit()
+    return True
@@ -0,0 +1,172 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from flask import Request, current_app, request, send_file
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Blob
+
+# --- ARMAZENAMENTO DE ANEXOS POR CONTEÚDO ---
+# Cada arquivo é gravado uma única vez em BLOB_FOLDER/ab/abcdef... (sha256 do
+# conteúdo): o mesmo PDF enviado por 30 alunos ocupa o disco uma vez só, e
+# nomes iguais não se sobrescrevem mais. Os uploads já são gravados em disco
+# enquanto o corpo da requisição chega, calculando o hash no caminho; no fim
+# basta renomear o arquivo temporário para o nome definitivo.
+
+CHUNK_SIZE = 64 * 1024
+
+class HashingFile:
+    """Arquivo temporário que calcula o sha256 do que é escrito nele"""
+
+    def __init__(self, folder):
+        self._file = tempfile.NamedTemporaryFile(dir=folder, prefix='upload-', delete=False)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.kept = False
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        if not self.kept:
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+class UploadRequest(Request):
+    """Grava os arquivos enviados direto na pasta de blobs, já com o hash"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        folder = _tmp_folder()
+        os.makedirs(folder, exist_ok=True)
+        return HashingFile(folder)
+
+def init_app(app):
+    app.request_class = UploadRequest
+
+def _tmp_folder():
+    return os.path.join(current_app.config['BLOB_FOLDER'], 'tmp')
+
+def blob_path(blob_hash):
+    return os.path.join(current_app.config['BLOB_FOLDER'], blob_hash[:2], blob_hash)
+
+def _hash_stream(stream):
+    """Copia o stream em blocos para um temporário, calculando o hash (uploads sem HashingFile)"""
+    folder = _tmp_folder()
+    os.makedirs(folder, exist_ok=True)
+    tmp = HashingFile(folder)
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            tmp.write(chunk)
+        tmp.flush()
+    except BaseException:
+        tmp.close()
+        raise
+    return tmp
+
+def store_upload(file):
+    """Guarda o arquivo enviado (FileStorage) e devolve o hash do conteúdo.
+
+    A referência do post é contada quando ele é gravado (evento de Post);
+    aqui só garantimos que o arquivo e a linha de Blob existam.
+    """
+    stream = file.stream
+    own_tmp = not isinstance(stream, HashingFile)
+    tmp = _hash_stream(stream) if own_tmp else stream
+    try:
+        tmp.flush()
+        blob_hash = tmp.sha256.hexdigest()
+        target = blob_path(blob_hash)
+        if os.path.exists(target):
+            os.utime(target)  # conteúdo repetido: renova a data para o gc não levar o arquivo
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp.name, target)
+            tmp.kept = True
+    finally:
+        if own_tmp:
+            tmp.close()
+
+    now = datetime.utcnow()
+    touched = db.session.execute(
+        db.update(Blob).where(Blob.hash == blob_hash).values(last_seen=now)
+        .execution_options(synchronize_session=False)).rowcount
+    if not touched:
+        try:
+            with db.session.begin_nested():
+                db.session.add(Blob(hash=blob_hash, size=tmp.size, refcount=0, last_seen=now))
+        except IntegrityError:
+            pass  # outro upload com o mesmo conteúdo criou a linha ao mesmo tempo
+    return blob_hash
+
+def send_blob(blob_hash, download_name, as_attachment=False):
+    """Resposta com o anexo, pronta para cache e downloads parciais.
+
+    O hash do conteúdo é o ETag (forte), então revalidações viram 304 sem ler
+    o arquivo, e Range (retomar download, abrir PDF por partes) vem do
+    send_file. Com USE_X_SENDFILE ou X_ACCEL_REDIRECT_PREFIX configurados,
+    quem envia os bytes é o servidor web (Apache/nginx), não o worker Python.
+    """
+    config = current_app.config
+    path = blob_path(blob_hash)
+    prefix = config.get('X_ACCEL_REDIRECT_PREFIX')
+    if prefix:
+        mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        relative = os.path.relpath(path, config['BLOB_FOLDER']).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                             filename=download_name)
+        response.set_etag(blob_hash)
+    else:
+        response = send_file(path, download_name=download_name, as_attachment=as_attachment,
+                             etag=blob_hash, conditional=True, max_age=config['ATTACHMENT_MAX_AGE'])
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+    # Anexos só para usuários logados: cache do navegador, não de proxies
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = config['ATTACHMENT_MAX_AGE']
+    if prefix:
+        return response.make_conditional(request)
+    return response
+
+def collect_garbage(grace=timedelta(hours=1)):
+    """Apaga blobs sem referência e arquivos órfãos; devolve (blobs, arquivos) removidos.
+
+    `grace` protege uploads recentes cujo post ainda não foi gravado.
+    """
+    cutoff = datetime.utcnow() - grace
+    dead = db.session.execute(
+        db.select(Blob.hash).where(Blob.refcount <= 0, Blob.last_seen < cutoff)).scalars().all()
+    if dead:
+        db.session.execute(db.delete(Blob).where(Blob.hash.in_(dead), Blob.refcount <= 0)
+                           .execution_options(synchronize_session=False))
+        db.session.commit()
+
+    folder = current_app.config['BLOB_FOLDER']
+    if not os.path.isdir(folder):
+        return len(dead), 0
+    known = set(db.session.execute(db.select(Blob.hash)).scalars())
+    removed = 0
+    cutoff_ts = time.time() - grace.total_seconds()
+    for root, dirs, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if name in known or os.path.getmtime(path) >= cutoff_ts:
+                continue
+            os.unlink(path)
+            removed += 1
+    return len(dead), removed
@@ -0,0 +1,87 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User
+from app.uow import xp_committed
+
+# --- ÍNDICE DE PREFIXOS PARA NOMES DE USUÁRIO ---
+# Lista ordenada de (nome em minúsculas, id): as sugestões de um prefixo são uma
+# fatia contígua achada com busca binária, sem ir ao banco. Montado no primeiro
+# uso e atualizado no cadastro, na troca de nome e a cada mudança de XP.
+
+class UsernameIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None     # [(username.lower(), user_id)]
+        self._users = {}      # user_id -> [username, xp]
+        self._built_at = 0
+
+    def invalidate(self):
+        self._keys = None
+
+    def _ensure(self):
+        ttl = current_app.config.get('USERNAME_INDEX_TTL')
+        if self._keys is not None and (not ttl or time.monotonic() - self._built_at < ttl):
+            return
+        with Session(db.engine) as session:
+            rows = session.query(User.id, User.username, User.xp).filter(User.username.isnot(None)).all()
+        with self._lock:
+            self._users = {uid: [name, xp or 0] for uid, name, xp in rows}
+            self._keys = sorted((name.lower(), uid) for uid, name, xp in rows)
+            self._built_at = time.monotonic()
+
+    def add(self, user):
+        if self._keys is None or not user.username:
+            return
+        with self._lock:
+            self._users[user.id] = [user.username, user.xp or 0]
+            insort(self._keys, (user.username.lower(), user.id))
+
+    def rename(self, user_id, new_username):
+        if self._keys is None:
+            return
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            key = (entry[0].lower(), user_id)
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+            if not new_username:
+                del self._users[user_id]
+                return
+            entry[0] = new_username
+            insort(self._keys, (new_username.lower(), user_id))
+
+    def add_xp(self, user_id, delta):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                entry[1] += delta
+
+    def suggest(self, prefix, limit=3):
+        """[(username, xp)] dos usuários cujo nome começa com o prefixo, por XP"""
+        self._ensure()
+        prefix = prefix.lower()
+        # Com a trava: rename/reconstrução não mexem nas listas no meio da busca
+        with self._lock:
+            keys, users = self._keys, self._users
+            if keys is None:
+                return []
+            lo = bisect_left(keys, (prefix,))
+            hi = bisect_left(keys, (prefix + '￿',))
+            best = heapq.nlargest(limit, (uid for _, uid in keys[lo:hi]),
+                                  key=lambda uid: users[uid][1])
+            return [tuple(users[uid]) for uid in best]
+
+usernames = UsernameIndex()
+
+@xp_committed.connect
+def _on_xp_committed(sender, events):
+    for ev in events:
+        usernames.add_xp(ev['user_id'], ev['amount'])
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import datetime
+from blinker import Namespace
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+
+# --- UNIDADE DE TRABALHO DA REQUISIÇÃO ---
+# XP, notificações, conquistas e contadores são acumulados durante a requisição
+# e gravados num único commit no final. Quem concede recompensas não faz commit:
+# só registra o que mudou aqui (ou na sessão) e segue.
+
+# Disparado depois do commit com os eventos de XP gravados
+# (lista de dicts: user_id, amount, reason, subject, timestamp...)
+_signals = Namespace()
+xp_committed = _signals.signal('xp-committed')
+
+def _source_subject(source):
+    """Matéria do objeto que gerou o XP (post ou comentário), se houver"""
+    subject = getattr(source, 'subject', None)
+    if subject is None and getattr(source, 'post', None) is not None:
+        subject = source.post.subject
+    return subject
+
+class UnitOfWork:
+    def __init__(self):
+        self.xp = defaultdict(int)   # user_id -> XP a somar no commit
+        self.xp_events = []          # (user, amount, reason, source, timestamp)
+        self.committed_xp = []       # eventos já gravados, para o sinal xp_committed
+        self._callbacks = []
+
+    def add_xp(self, user, amount, reason=None, source=None):
+        """Soma XP ao usuário; o valor em memória já reflete a mudança"""
+        self.xp[user.id] += amount
+        self.xp_events.append((user, amount, reason, source, datetime.utcnow()))
+        # Atualiza o valor lido pelos templates sem marcar o atributo como sujo:
+        # quem grava é o UPDATE xp = xp + delta em _apply (sem perder atualizações
+        # concorrentes de outras requisições).
+        set_committed_value(user, 'xp', (user.xp or 0) + amount)
+
+    def after_commit(self, fn):
+        """Agenda fn() para depois do commit (descartada em caso de rollback)"""
+        self._callbacks.append(fn)
+
+    @property
+    def pending(self):
+        return bool(self.xp or self.xp_events or self._callbacks)
+
+    def _apply(self, session):
+        from app.models import User, XpEvent
+        if self.xp_events:
+            # Garante o id dos objetos de origem criados nesta requisição
+            session.flush()
+            rows = [{'user_id': user.id, 'amount': amount, 'reason': reason,
+                     'source_type': source.__tablename__ if source is not None else None,
+                     'source_id': source.id if source is not None else None,
+                     'subject': _source_subject(source),
+                     'timestamp': timestamp}
+                    for user, amount, reason, source, timestamp in self.xp_events]
+            session.execute(db.insert(XpEvent), rows)
+            self.committed_xp.extend(rows)
+            self.xp_events.clear()
+        # Total materializado: um UPDATE incremental por usuário
+        for user_id, delta in self.xp.items():
+            if delta:
+                session.execute(db.update(User).where(User.id == user_id)
+                                .values(xp=db.func.coalesce(User.xp, 0) + delta)
+                                .execution_options(synchronize_session=False))
+        self.xp.clear()
+
+def current_uow():
+    """Unidade de trabalho ligada à sessão atual"""
+    return db.session.info.setdefault('uow', UnitOfWork())
+
+# SAVEPOINTs (begin_nested) também disparam esses eventos: a unidade de
+# trabalho só é gravada/descartada junto com a transação externa
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    if session.in_nested_transaction():
+        return
+    uow = session.info.get('uow')
+    if uow is not None:
+        uow._apply(session)
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    if session.in_nested_transaction():
+        return
+    uow = session.info.pop('uow', None)
+    if uow is not None:
+        if uow.committed_xp:
+            xp_committed.send(uow, events=uow.committed_xp)
+        for fn in uow._callbacks:
+            fn()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is not None:
+        return
+    session.info.pop('uow', None)
+
+def init_app(app):
+    @app.after_request
+    def commit_unit_of_work(response):
+        # Grava o que ficou pendente na requisição (um único commit no final)
+        session = db.session
+        if response.status_code >= 400:
+            session.rollback()
+        elif session.new or session.dirty or session.deleted or \
+                ('uow' in session.info and session.info['uow'].pending):
+            session.commit()
+        return response
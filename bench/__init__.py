@@ -0,0 +1,25 @@
+import os
+from config import Config, basedir
+
+# --- BENCHMARKS ---
+# Bancos sintéticos reproduzíveis e medição das rotas principais, para
+# comparar commits entre si:
+#   python -m bench generate --scale 100k
+#   python -m bench run --scale 100k            (grava storage/bench/results/*.json)
+#   python -m bench compare antes.json depois.json
+# Cada escala tem o seu banco (storage/bench/<escala>.db); o banco do app
+# nunca é tocado.
+
+BENCH_DIR = os.path.join(basedir, 'storage/bench')
+
+def database_path(scale):
+    return os.path.join(BENCH_DIR, f'{scale}.db')
+
+def make_config(scale, database_url=None, cache_type='lru'):
+    """Config do app apontando para o banco de benchmark da escala"""
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url or 'sqlite:///' + database_path(scale)
+        CACHE_TYPE = cache_type
+        # Contadores de uso em memória: nada de arquivo compartilhado entre execuções
+        RATELIMIT_BACKEND = 'memory'
+    return BenchConfig
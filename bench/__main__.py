@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime
+import click
+from app import create_app
+from bench import BENCH_DIR, database_path, make_config
+from bench.dataset import SCALES, generate, save_summary
+from bench.runner import ROUTE_NAMES, compare, measure, report
+
+def _summary_path(scale):
+    return os.path.join(BENCH_DIR, f'{scale}.json')
+
+@click.group()
+def cli():
+    """Benchmarks do BrainShare (dados sintéticos + tempo das rotas)"""
+
+@cli.command('generate')
+@click.option('--scale', type=click.Choice(list(SCALES)), default='1k', show_default=True)
+@click.option('--seed', type=int, default=42, show_default=True)
+@click.option('--database-url', help='Outro banco (ex.: PostgreSQL). Todas as tabelas são recriadas!')
+def generate_command(scale, seed, database_url):
+    """Cria o banco sintético da escala escolhida"""
+    if not database_url:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(database_path(scale) + suffix):
+                os.remove(database_path(scale) + suffix)
+    app = create_app(make_config(scale, database_url))
+    started = datetime.utcnow()
+    with app.app_context():
+        summary = generate(scale, seed)
+    summary['seconds'] = round((datetime.utcnow() - started).total_seconds(), 1)
+    save_summary(_summary_path(scale), summary)
+    click.echo(f'>> {summary["users"]} usuários, {summary["posts"]} posts, {summary["likes"]} curtidas, '
+               f'{summary["comments"]} comentários em {summary["seconds"]}s.')
+
+@cli.command('run')
+@click.option('--scale', type=click.Choice(list(SCALES)), default='1k', show_default=True)
+@click.option('--database-url', help='Banco gerado com --database-url.')
+@click.option('--repeat', type=int, default=20, show_default=True)
+@click.option('--warmup', type=int, default=3, show_default=True)
+@click.option('--cache', 'cache_type', type=click.Choice(['lru', 'null']), default='lru', show_default=True,
+              help='null mede sempre o caminho sem cache de HTML.')
+@click.option('--route', 'only', multiple=True, type=click.Choice(ROUTE_NAMES), help='Só estas rotas.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Arquivo JSON do resultado.')
+def run_command(scale, database_url, repeat, warmup, cache_type, only, output):
+    """Mede as rotas no banco sintético e grava o resultado em JSON"""
+    if not database_url and not os.path.exists(database_path(scale)):
+        raise click.ClickException(f'Banco {scale} não existe: rode `python -m bench generate --scale {scale}`.')
+    dataset = {'scale': scale}
+    if os.path.exists(_summary_path(scale)):
+        with open(_summary_path(scale)) as f:
+            dataset = json.load(f)
+
+    app = create_app(make_config(scale, database_url, cache_type))
+    try:
+        results = measure(app, repeat=repeat, warmup=warmup, only=only)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    result = report(app, dataset, results, repeat, warmup)
+
+    for name, stats in results.items():
+        click.echo(f'   {name:<20} p50 {stats["p50_ms"]:>9.2f} ms  p95 {stats["p95_ms"]:>9.2f} ms  '
+                   f'cold {stats["cold_ms"]:>9.2f} ms  {stats["queries"]:>3} consultas')
+    if not output:
+        commit = (result['commit'] or 'sem-git')[:10] + ('-dirty' if result['dirty'] else '')
+        output = os.path.join(BENCH_DIR, 'results',
+                              f'{scale}-{commit}-{datetime.utcnow():%Y%m%d%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    click.echo(f'>> Resultado em {output}')
+
+@cli.command('compare')
+@click.argument('old', type=click.File())
+@click.argument('new', type=click.File())
+def compare_command(old, new):
+    """Compara dois resultados (p50 e número de consultas por rota)"""
+    old, new = json.load(old), json.load(new)
+    click.echo(f'   {(old["commit"] or "?")[:10]} -> {(new["commit"] or "?")[:10]}')
+    for name, before, after, change, q_before, q_after in compare(old, new):
+        before = f'{before:9.2f}' if before is not None else '        -'
+        change = f'{change:+6.1f}%' if change is not None else '      -'
+        queries = f'{q_before} -> {q_after}' if q_before is not None else f'{q_after}'
+        click.echo(f'   {name:<20} {before} -> {after:9.2f} ms  {change}  consultas {queries}')
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,146 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from app import db
+from app.models import Comment, Post, User, XpEvent, post_likes
+from app.search import rebuild_index
+from app.seed import seed_achievements, seed_mascotes
+
+# --- DADOS SINTÉTICOS ---
+# Mesmo tamanho + mesma semente = mesmo banco, linha por linha. As distribuições
+# imitam uma rede real: poucos usuários publicam quase tudo (Zipf), a maioria
+# dos posts tem 0-2 curtidas e alguns viralizam (Pareto), comentários seguem
+# uma exponencial. Tudo entra em lote pelos próprios modelos do app.
+
+SCALES = {
+    '1k': {'users': 200, 'posts': 1_000},
+    '100k': {'users': 10_000, 'posts': 100_000},
+    '1m': {'users': 50_000, 'posts': 1_000_000},
+}
+
+PASSWORD = 'bench'
+START = datetime(2025, 1, 1)
+DAYS = 365
+BATCH = 10_000
+
+WORDS = ('algebra funcao derivada integral matriz vetor equacao grafico celula energia '
+         'atomo reacao historia filosofia revolucao ingles verbo gramatica python codigo '
+         'algoritmo banco dados rede prova resumo exercicio duvida lista revisao conceito '
+         'exemplo teorema limite probabilidade estatistica fisica quimica biologia mapa').split()
+
+SUBJECT_WEIGHTS = {'Tecnologia': 30, 'Matematica': 25, 'Ciencias': 20, 'Humanas': 10, 'Idiomas': 5, 'Geral': 10}
+
+def _zipf_weights(n, s=1.1):
+    """Pesos acumulados de n itens (o primeiro é o mais ativo)"""
+    return list(accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+def _text(rng, size):
+    return ' '.join(rng.choices(WORDS, k=size))
+
+def _insert(table, rows):
+    if rows:
+        db.session.execute(db.insert(table), rows)
+        rows.clear()
+
+def generate(scale, seed=42):
+    """Apaga e recria as tabelas do banco configurado com o conjunto `scale`.
+
+    Use sempre um banco só para benchmark (o padrão de `python -m bench`).
+    Retorna o resumo do que foi gerado.
+    """
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    n_users, n_posts = sizes['users'], sizes['posts']
+
+    db.drop_all()
+    db.create_all()
+    seed_achievements()
+    seed_mascotes()
+
+    # Usuários: a senha é a mesma para todos (um hash só)
+    probe = User()
+    probe.set_password(PASSWORD)
+    users = []
+    for uid in range(1, n_users + 1):
+        users.append({'id': uid, 'username': f'user{uid}', 'email': f'user{uid}@bench.local',
+                      'password_hash': probe.password_hash, 'xp': 0,
+                      'role': 'professor' if uid % 50 == 0 else 'student',
+                      'job_title': 'Estudante', 'unread_notifications': 0})
+        if len(users) >= BATCH:
+            _insert(User, users)
+    _insert(User, users)
+
+    activity = _zipf_weights(n_users)
+    population = range(1, n_users + 1)
+    subjects, subject_weights = zip(*SUBJECT_WEIGHTS.items())
+    step = timedelta(days=DAYS) / n_posts
+    xp = [0] * (n_users + 1)
+    posts, likes, comments, events = [], [], [], []
+    comment_id = 0
+    totals = {'likes': 0, 'comments': 0, 'xp_events': 0}
+
+    def xp_event(uid, amount, reason, source_type, source_id, subject, timestamp):
+        xp[uid] += amount
+        totals['xp_events'] += 1
+        events.append({'user_id': uid, 'amount': amount, 'reason': reason, 'source_type': source_type,
+                       'source_id': source_id, 'subject': subject, 'timestamp': timestamp})
+
+    for post_id in range(1, n_posts + 1):
+        author = rng.choices(population, cum_weights=activity)[0]
+        subject = rng.choices(subjects, subject_weights)[0]
+        kind = 'material' if rng.random() < 0.3 else 'duvida'
+        timestamp = START + step * post_id
+
+        # Curtidas: cauda longa (a maioria com 0-2, poucos posts com centenas);
+        # quem é mais ativo também curte mais
+        n_likes = min(int(rng.paretovariate(1.5)) - 1, n_users // 2)
+        likers = set(rng.choices(population, cum_weights=activity, k=n_likes))
+        likers.discard(author)
+        n_comments = int(rng.expovariate(1 / 1.5))
+
+        posts.append({'id': post_id, 'title': _text(rng, rng.randint(3, 8)).capitalize(),
+                      'body': _text(rng, rng.randint(20, 120)), 'type': kind, 'subject': subject,
+                      'timestamp': timestamp, 'user_id': author,
+                      'status': 'denunciada' if rng.random() < 0.01 else 'normal',
+                      'like_count': len(likers), 'comment_count': n_comments})
+        if kind == 'material':
+            xp_event(author, 50, 'material', 'post', post_id, subject, timestamp)
+        else:
+            xp_event(author, 10, 'post', 'post', post_id, subject, timestamp)
+        for liker in likers:
+            likes.append({'user_id': liker, 'post_id': post_id})
+            xp_event(author, 10, 'like_received', 'post', post_id, subject, timestamp)
+        for _ in range(n_comments):
+            comment_id += 1
+            commenter = rng.choices(population, cum_weights=activity)[0]
+            when = timestamp + timedelta(minutes=rng.randint(1, 3 * 24 * 60))
+            comments.append({'id': comment_id, 'body': _text(rng, rng.randint(5, 40)), 'timestamp': when,
+                             'is_best_answer': False, 'user_id': commenter, 'post_id': post_id})
+            xp_event(commenter, 20, 'comment', 'comment', comment_id, subject, when)
+        totals['likes'] += len(likers)
+        totals['comments'] += n_comments
+
+        if len(posts) >= BATCH:
+            for table, rows in ((Post, posts), (post_likes, likes), (Comment, comments), (XpEvent, events)):
+                _insert(table, rows)
+            db.session.commit()
+    for table, rows in ((Post, posts), (post_likes, likes), (Comment, comments), (XpEvent, events)):
+        _insert(table, rows)
+
+    # XP materializado igual à soma do histórico (`flask xp recompute` não muda nada)
+    users_table = User.__table__
+    db.session.execute(users_table.update().where(users_table.c.id == db.bindparam('uid'))
+                       .values(xp=db.bindparam('total')),
+                       [{'uid': uid, 'total': total} for uid, total in enumerate(xp) if total])
+    db.session.commit()
+    if db.engine.dialect.name == 'sqlite':
+        rebuild_index()
+
+    return dict(scale=scale, seed=seed, users=n_users, posts=n_posts, **totals)
+
+def save_summary(path, summary):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
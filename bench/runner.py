@@ -0,0 +1,153 @@
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from app import db
+from app.cache import cache
+from app.catalog import catalog
+from app.leaderboard import leaderboard
+from app.models import Comment, Post, User
+from app.typeahead import usernames
+from bench.dataset import PASSWORD
+
+# --- MEDIÇÃO DAS ROTAS ---
+# Cada rota é chamada pelo test client (roteamento, login, templates e banco
+# de verdade, sem rede). A primeira chamada sai com os caches do processo
+# vazios ("cold"); depois de `warmup` chamadas, medimos `repeat` vezes. Para
+# cada chamada contamos também as consultas SQL enviadas ao banco.
+
+def _targets():
+    """Parâmetros das rotas: o autor com mais posts e o post mais comentado"""
+    author = db.session.execute(
+        select(User.username).join(Post, Post.user_id == User.id)
+        .group_by(User.id).order_by(func.count(Post.id).desc()).limit(1)).scalar()
+    post_id = db.session.execute(
+        select(Comment.post_id).group_by(Comment.post_id)
+        .order_by(func.count(Comment.id).desc()).limit(1)).scalar()
+    return author, post_id
+
+ROUTE_NAMES = ['feed', 'feed_subject', 'leaderboard', 'leaderboard_week', 'leaderboard_subject',
+               'search', 'search_live', 'profile', 'post_detail']
+
+def routes():
+    """[(nome, url)] medidos em cada execução (na ordem de ROUTE_NAMES)"""
+    author, post_id = _targets()
+    return [
+        ('feed', '/'),
+        ('feed_subject', '/?subject=Matematica'),
+        ('leaderboard', '/leaderboard'),
+        ('leaderboard_week', '/leaderboard?period=week'),
+        ('leaderboard_subject', '/leaderboard?subject=Tecnologia'),
+        ('search', '/search?q=derivada integral'),
+        ('search_live', '/search/live?q=alg'),
+        ('profile', f'/user/{author}'),
+        ('post_detail', f'/post/{post_id}'),
+    ]
+
+def _reset_caches():
+    cache.clear()
+    catalog.invalidate()
+    leaderboard.invalidate()
+    usernames.invalidate()
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _call(client, engine, url):
+    with QueryCounter(engine) as counter:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} respondeu {response.status_code}')
+    return elapsed, counter.count
+
+def measure(app, repeat=20, warmup=3, viewer_id=1, only=None):
+    """Mede as rotas e devolve {nome: estatísticas em ms e consultas}"""
+    # As requisições rodam fora de um app_context nosso: cada uma abre o seu,
+    # com sessão e `g` novos, como em produção
+    with app.app_context():
+        engine = db.engine
+        viewer_email = db.session.get(User, viewer_id).email
+        targets = [(name, url) for name, url in routes() if not only or name in only]
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': viewer_email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError('Login do usuário de benchmark falhou.')
+
+    results = {}
+    for name, url in targets:
+        with app.app_context():
+            _reset_caches()
+        cold_ms, cold_queries = _call(client, engine, url)
+        for _ in range(warmup):
+            _call(client, engine, url)
+        timings, queries = [], []
+        for _ in range(repeat):
+            elapsed, count = _call(client, engine, url)
+            timings.append(elapsed)
+            queries.append(count)
+        results[name] = {
+            'url': url,
+            'cold_ms': round(cold_ms, 3),
+            'cold_queries': cold_queries,
+            'min_ms': round(min(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(_percentile(timings, 95), 3),
+            'max_ms': round(max(timings), 3),
+            'queries': max(queries),
+        }
+    return results
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def report(app, dataset, results, repeat, warmup):
+    """Resultado completo (com commit e ambiente) pronto para gravar em JSON"""
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'dataset': dataset,
+        'database': make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name(),
+        'cache_type': app.config['CACHE_TYPE'],
+        'repeat': repeat,
+        'warmup': warmup,
+        'python': platform.python_version(),
+        'routes': results,
+    }
+
+def compare(old, new):
+    """Linhas (rota, p50 antes, p50 depois, variação %, consultas antes, depois)"""
+    rows = []
+    for name, after in new['routes'].items():
+        before = old['routes'].get(name)
+        if before is None:
+            rows.append((name, None, after['p50_ms'], None, None, after['queries']))
+            continue
+        change = (after['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else None
+        rows.append((name, before['p50_ms'], after['p50_ms'], change, before['queries'], after['queries']))
+    return rows
@@ -0,0 +1,56 @@
+"""full-text search index (SQLite FTS5)
+
+Revision ID: 0a7c4e2b9d13
+Revises: f3b9d27a6e58
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7c4e2b9d13'
+down_revision = 'f3b9d27a6e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Só o SQLite tem FTS5; nos outros bancos a busca usa ILIKE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("CREATE VIRTUAL TABLE post_fts USING fts5("
+               "title, body, content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    op.execute("CREATE VIRTUAL TABLE user_fts USING fts5("
+               "username, content='user', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+
+    # Triggers mantêm os índices em dia com post/user
+    op.execute("CREATE TRIGGER post_fts_ai AFTER INSERT ON post BEGIN "
+               "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END")
+    op.execute("CREATE TRIGGER post_fts_ad AFTER DELETE ON post BEGIN "
+               "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END")
+    op.execute("CREATE TRIGGER post_fts_au AFTER UPDATE OF title, body ON post BEGIN "
+               "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+               "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END")
+    op.execute("CREATE TRIGGER user_fts_ai AFTER INSERT ON user BEGIN "
+               "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END")
+    op.execute("CREATE TRIGGER user_fts_ad AFTER DELETE ON user BEGIN "
+               "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); END")
+    op.execute("CREATE TRIGGER user_fts_au AFTER UPDATE OF username ON user BEGIN "
+               "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); "
+               "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END")
+
+    # Indexa o que já existe
+    op.execute("INSERT INTO post_fts(post_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO user_fts(user_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for trigger in ('post_fts_ai', 'post_fts_ad', 'post_fts_au', 'user_fts_ai', 'user_fts_ad', 'user_fts_au'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS post_fts")
+    op.execute("DROP TABLE IF EXISTS user_fts")
@@ -0,0 +1,34 @@
+"""unread notifications counter
+
+Revision ID: 1b6d3f8e2a74
+Revises: 0a7c4e2b9d13
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b6d3f8e2a74'
+down_revision = '0a7c4e2b9d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notifications', sa.Integer(), nullable=False, server_default='0'))
+
+    # Preenche o contador a partir das notificações existentes
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('unread_notifications', sa.Integer))
+    notification = sa.table('notification', sa.column('recipient_id', sa.Integer), sa.column('is_read', sa.Boolean))
+    unread = (sa.select(sa.func.count()).select_from(notification)
+              .where(notification.c.recipient_id == user.c.id, notification.c.is_read == sa.false())
+              .scalar_subquery())
+    op.execute(user.update().values(unread_notifications=unread))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_notifications')
@@ -0,0 +1,25 @@
+"""notification recipient/is_read/timestamp index
+
+Revision ID: 2c8e4a1f6b35
+Revises: 1b6d3f8e2a74
+Create Date: 2026-10-18 15:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8e4a1f6b35'
+down_revision = '1b6d3f8e2a74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_recipient_read_timestamp', ['recipient_id', 'is_read', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_recipient_read_timestamp')
@@ -0,0 +1,64 @@
+"""content-addressed upload storage
+
+Revision ID: 4e1a6c3d8f57
+Revises: 3d9f5b2c7e46
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e1a6c3d8f57'
+down_revision = '3d9f5b2c7e46'
+branch_labels = None
+depends_on = None
+
+
+# O batch do SQLite recria a tabela post e com isso apaga os triggers do FTS5
+POST_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ai AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_ad AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_au AFTER UPDATE OF title, body ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+
+
+def restore_post_fts_triggers():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    if bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'post_fts'")).first():
+        for ddl in POST_FTS_TRIGGERS:
+            op.execute(ddl)
+
+
+def upgrade():
+    op.create_table('blob',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_seen', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_post_blob_hash'), ['blob_hash'], unique=False)
+        batch_op.create_foreign_key('fk_post_blob_hash_blob', 'blob', ['blob_hash'], ['hash'])
+
+    restore_post_fts_triggers()
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_post_blob_hash_blob', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_post_blob_hash'))
+        batch_op.drop_column('blob_hash')
+
+    restore_post_fts_triggers()
+
+    op.drop_table('blob')
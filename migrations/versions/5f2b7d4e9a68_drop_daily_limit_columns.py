@@ -0,0 +1,55 @@
+"""drop daily limit columns (limits moved to app.ratelimit)
+
+Revision ID: 5f2b7d4e9a68
+Revises: 4e1a6c3d8f57
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2b7d4e9a68'
+down_revision = '4e1a6c3d8f57'
+branch_labels = None
+depends_on = None
+
+
+# O batch do SQLite recria a tabela user e com isso apaga os triggers do FTS5
+USER_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN "
+    "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF username ON user BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username) VALUES ('delete', old.id, old.username); "
+    "INSERT INTO user_fts(rowid, username) VALUES (new.id, new.username); END",
+]
+
+
+def restore_user_fts_triggers():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    if bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'user_fts'")).first():
+        for ddl in USER_FTS_TRIGGERS:
+            op.execute(ddl)
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('last_activity_reset')
+        batch_op.drop_column('daily_comments')
+        batch_op.drop_column('daily_likes')
+
+    restore_user_fts_triggers()
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('daily_likes', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('daily_comments', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('last_activity_reset', sa.DateTime(), nullable=True))
+
+    restore_user_fts_triggers()
@@ -0,0 +1,81 @@
+"""primary keys for association tables and hot-path indexes
+
+Revision ID: 6a3c8e5f1b79
+Revises: 5f2b7d4e9a68
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a3c8e5f1b79'
+down_revision = '5f2b7d4e9a68'
+branch_labels = None
+depends_on = None
+
+
+def dedupe(table, key, extra=''):
+    """Remove linhas duplicadas (e com chave nula) antes de criar a chave primária"""
+    cols = ', '.join(key)
+    op.execute(f"CREATE TEMPORARY TABLE {table}_dedupe AS "
+               f"SELECT {cols}{', min(' + extra + ') AS ' + extra if extra else ''} FROM {table} "
+               f"WHERE {' AND '.join(c + ' IS NOT NULL' for c in key)} GROUP BY {cols}")
+    op.execute(f"DELETE FROM {table}")
+    op.execute(f"INSERT INTO {table} ({cols}{', ' + extra if extra else ''}) "
+               f"SELECT {cols}{', ' + extra if extra else ''} FROM {table}_dedupe")
+    op.execute(f"DROP TABLE {table}_dedupe")
+
+
+def upgrade():
+    # Curtidas repetidas tinham entrado em like_count: recontamos depois de limpar
+    dedupe('post_likes', ['user_id', 'post_id'])
+    op.execute("UPDATE post SET like_count = ("
+               "SELECT count(*) FROM post_likes WHERE post_likes.post_id = post.id)")
+    with op.batch_alter_table('post_likes', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('post_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key('pk_post_likes', ['user_id', 'post_id'])
+        batch_op.create_index('ix_post_likes_post_id', ['post_id'], unique=False)
+
+    dedupe('user_achievements', ['user_id', 'achievement_id'], extra='unlocked_at')
+    with op.batch_alter_table('user_achievements', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('achievement_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key('pk_user_achievements', ['user_id', 'achievement_id'])
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_subject_timestamp', ['subject', 'timestamp'], unique=False)
+        batch_op.create_index('ix_post_user_id_timestamp', ['user_id', 'timestamp'], unique=False)
+        batch_op.create_index('ix_post_status', ['status'], unique=False)
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_post_id_timestamp', ['post_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_recipient_timestamp', ['recipient_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_recipient_timestamp')
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_post_id_timestamp')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_status')
+        batch_op.drop_index('ix_post_user_id_timestamp')
+        batch_op.drop_index('ix_post_subject_timestamp')
+
+    with op.batch_alter_table('user_achievements', schema=None) as batch_op:
+        batch_op.drop_constraint('pk_user_achievements', type_='primary')
+        batch_op.alter_column('achievement_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+
+    with op.batch_alter_table('post_likes', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_likes_post_id')
+        batch_op.drop_constraint('pk_post_likes', type_='primary')
+        batch_op.alter_column('post_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
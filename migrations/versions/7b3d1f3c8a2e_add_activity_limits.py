@@ -25,7 +25,7 @@ def upgrade():
         # last_activity_reset can remain nullable; set to current time for existing rows
         batch_op.add_column(sa.Column('last_activity_reset', sa.DateTime(), nullable=True))
     # Ensure existing NULL last_activity_reset values are set to now (optional)
-    op.execute("UPDATE user SET last_activity_reset = CURRENT_TIMESTAMP WHERE last_activity_reset IS NULL")
+    op.execute('UPDATE "user" SET last_activity_reset = CURRENT_TIMESTAMP WHERE last_activity_reset IS NULL')
 
 
 def downgrade():
@@ -0,0 +1,34 @@
+"""unique (tipo, evolucao) on mascote
+
+Revision ID: 7c4d9f6a2e81
+Revises: 6a3c8e5f1b79
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d9f6a2e81'
+down_revision = '6a3c8e5f1b79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Estágios repetidos: as adoções passam a apontar para a linha mais antiga
+    # de cada (tipo, evolucao) e as cópias são apagadas
+    op.execute("UPDATE mascote_usuario SET mascote_id = ("
+               "SELECT min(m2.id) FROM mascote m1 JOIN mascote m2 "
+               "ON m2.tipo = m1.tipo AND m2.evolucao = m1.evolucao "
+               "WHERE m1.id = mascote_usuario.mascote_id) "
+               "WHERE mascote_id IN (SELECT id FROM mascote)")
+    op.execute("DELETE FROM mascote WHERE id NOT IN ("
+               "SELECT min(id) FROM mascote GROUP BY tipo, evolucao)")
+    with op.batch_alter_table('mascote', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_mascote_tipo_evolucao', ['tipo', 'evolucao'])
+
+
+def downgrade():
+    with op.batch_alter_table('mascote', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_mascote_tipo_evolucao', type_='unique')
@@ -0,0 +1,32 @@
+"""post like/comment counters
+
+Revision ID: d41e7a9b3c10
+Revises: c89aa72b0005
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e7a9b3c10'
+down_revision = 'c89aa72b0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Preenche os contadores a partir dos dados existentes
+    op.execute("UPDATE post SET like_count = (SELECT COUNT(*) FROM post_likes WHERE post_likes.post_id = post.id)")
+    op.execute("UPDATE post SET comment_count = (SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id)")
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
@@ -0,0 +1,45 @@
+"""xp events ledger
+
+Revision ID: e5a2c8d1f047
+Revises: d41e7a9b3c10
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a2c8d1f047'
+down_revision = 'd41e7a9b3c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('xp_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('reason', sa.String(length=50), nullable=True),
+    sa.Column('source_type', sa.String(length=20), nullable=True),
+    sa.Column('source_id', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('xp_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_xp_events_timestamp'), ['timestamp'], unique=False)
+        batch_op.create_index('ix_xp_events_user_timestamp', ['user_id', 'timestamp'], unique=False)
+
+    # Saldo inicial: o histórico começa com o XP que cada usuário já tem
+    op.execute('INSERT INTO xp_events (user_id, amount, reason, timestamp) '
+               'SELECT id, xp, \'opening_balance\', CURRENT_TIMESTAMP FROM "user" WHERE xp IS NOT NULL AND xp != 0')
+
+
+def downgrade():
+    with op.batch_alter_table('xp_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_xp_events_user_timestamp')
+        batch_op.drop_index(batch_op.f('ix_xp_events_timestamp'))
+
+    op.drop_table('xp_events')
@@ -0,0 +1,34 @@
+"""xp events subject
+
+Revision ID: f3b9d27a6e58
+Revises: e5a2c8d1f047
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d27a6e58'
+down_revision = 'e5a2c8d1f047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('xp_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subject', sa.String(length=50), nullable=True))
+        batch_op.create_index('ix_xp_events_subject_timestamp', ['subject', 'timestamp'], unique=False)
+
+    # Preenche a matéria dos eventos já existentes a partir do post de origem
+    op.execute("UPDATE xp_events SET subject = (SELECT post.subject FROM post WHERE post.id = xp_events.source_id) "
+               "WHERE source_type = 'post'")
+    op.execute("UPDATE xp_events SET subject = (SELECT post.subject FROM comment JOIN post ON post.id = comment.post_id "
+               "WHERE comment.id = xp_events.source_id) WHERE source_type = 'comment'")
+
+
+def downgrade():
+    with op.batch_alter_table('xp_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_xp_events_subject_timestamp')
+        batch_op.drop_column('subject')